@@ -6,80 +6,189 @@ Uses the FastAPI backend to run comprehensive evaluations
 
 import asyncio
 import aiohttp
+import numpy as np
+import orjson
 import pandas as pd
-import json
 import os
+import sys
 import time
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 
+# Test data files, keyed by dataset
+CSV_FILES = {
+    "source_accounts": "fis-io-ledger-accounts.csv",
+    "target_accounts": "bny-eagle-ledger-accounts.csv",
+    "ground_truth": "ground-truth-mappings.csv",
+    "test_cases": "evaluation-test-cases.csv",
+}
+
+# CSV column -> API field name
+SOURCE_COLUMNS = {
+    "Account_Code": "account_code",
+    "Account_Description": "account_description",
+    "Account_Type": "account_type",
+    "Account_Category": "account_category",
+}
+TARGET_COLUMNS = {
+    "GL_Account": "account_code",
+    "GL_Description": "account_description",
+    "Account_Class": "account_type",
+    "Sub_Class": "account_category",
+    # Flat optional fields rather than a nested metadata object per row
+    "Department": "department",
+    "Cost_Center": "cost_center",
+}
+
+# Explicit CSV schemas: account codes stay strings and no dtype inference runs
+STRING = "string[pyarrow]"
+SOURCE_DTYPES = {
+    "Account_Code": STRING,
+    "Account_Description": STRING,
+    "Account_Type": STRING,
+    "Account_Category": STRING,
+    "Balance_Sheet_Category": STRING,
+    "Income_Statement_Category": STRING,
+    "Active": "bool[pyarrow]",
+    "Created_Date": STRING,
+    "Last_Modified": STRING,
+}
+TARGET_DTYPES = {
+    "GL_Account": STRING,
+    "GL_Description": STRING,
+    "Account_Class": STRING,
+    "Sub_Class": STRING,
+    "Financial_Statement": STRING,
+    "Normal_Balance": STRING,
+    "Status": STRING,
+    "Department": STRING,
+    "Cost_Center": STRING,
+}
+GROUND_TRUTH_DTYPES = {
+    "Source_Account_Code": STRING,
+    "Source_Description": STRING,
+    "Target_Account_Code": STRING,
+    "Target_Description": STRING,
+    "Mapping_Confidence": "int64[pyarrow]",
+    "Mapping_Type": STRING,
+    "Notes": STRING,
+}
+TEST_CASE_DTYPES = {
+    "Test_Case_ID": STRING,
+    "Source_Account": STRING,
+    "Expected_Target": STRING,
+    "Expected_Confidence_Range": STRING,
+    "Test_Category": STRING,
+    "Difficulty_Level": STRING,
+    "Expected_Reasoning_Keywords": STRING,
+    "Notes": STRING,
+}
+
+MAPPING_CONTEXT = "Evaluation test - mapping FIS IO accounts to BNY Eagle accounts"
+CONFIDENCE_THRESHOLD = 80
+
+# Fields read from each mapping result when reporting
+RESULT_FIELDS = itemgetter(
+    'source_account_code', 'target_account_code', 'confidence_score', 'reasoning', 'alternatives'
+)
+
+# Target accounts per chunk when streaming the mapping request body
+STREAM_CHUNK_SIZE = 500
+
 class AccountMappingEvaluator:
-    def __init__(self, api_base_url="http://localhost:8000"):
+    def __init__(self, api_base_url="http://localhost:8000", max_concurrency=4):
         self.api_base_url = api_base_url
+        self.max_concurrency = max_concurrency
         self.test_data_path = Path(__file__).parent / "test-data"
+        self._csv_paths = {
+            name: os.fspath(self.test_data_path / filename)
+            for name, filename in CSV_FILES.items()
+        }
         self.session = None
         
-    async def get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-        return self.session
+    async def __aenter__(self):
+        # One pooled session per evaluator, kept warm across every request it makes
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=64,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=120, connect=10),
+            headers={"Content-Type": "application/json"}
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_session()
     
     async def close_session(self):
         if self.session:
             await self.session.close()
+            self.session = None
     
     def load_test_data(self):
         """Load all test data files"""
         print("📚 Loading test data...")
         
         # Load CSV files
-        self.source_accounts = pd.read_csv(self.test_data_path / "fis-io-ledger-accounts.csv")
-        self.target_accounts = pd.read_csv(self.test_data_path / "bny-eagle-ledger-accounts.csv")
-        self.ground_truth = pd.read_csv(self.test_data_path / "ground-truth-mappings.csv")
-        self.test_cases = pd.read_csv(self.test_data_path / "evaluation-test-cases.csv")
+        self.source_accounts = self._read_csv(self._csv_paths["source_accounts"], SOURCE_DTYPES)
+        self.target_accounts = self._read_csv(self._csv_paths["target_accounts"], TARGET_DTYPES)
+        self.ground_truth = self._read_csv(self._csv_paths["ground_truth"], GROUND_TRUTH_DTYPES)
+        self.test_cases = self._read_csv(self._csv_paths["test_cases"], TEST_CASE_DTYPES)
+
+        # Indexed by code so sample lookups are a join instead of a scan per test case
+        self._source_by_code = self.source_accounts.set_index('Account_Code')
+        
+        # API payloads are built once per load and reused by every evaluation
+        self._source_payload, self._target_payload = self.prepare_api_data()
+        self._base_request = {
+            "target_accounts": self._target_payload,
+            "mapping_context": MAPPING_CONTEXT,
+            "confidence_threshold": CONFIDENCE_THRESHOLD
+        }
         
         print(f"✅ Loaded {len(self.source_accounts)} source accounts")
         print(f"✅ Loaded {len(self.target_accounts)} target accounts")
         print(f"✅ Loaded {len(self.ground_truth)} ground truth mappings")
         print(f"✅ Loaded {len(self.test_cases)} test cases")
     
+    @staticmethod
+    def _read_csv(path, dtype):
+        """Read a CSV with the multithreaded Arrow parser into Arrow-backed columns"""
+        return pd.read_csv(path, engine='pyarrow', dtype_backend='pyarrow', dtype=dtype)
+    
+    @staticmethod
+    def _to_api_records(df, columns):
+        """Project string columns to API field names, column-wise (NA -> None)"""
+        fields = {
+            name: df[col].astype(object).where(df[col].notna(), None)
+            for col, name in columns.items()
+        }
+        return pd.DataFrame(fields).to_dict('records')
+
     def prepare_api_data(self):
         """Convert pandas DataFrames to API-compatible format"""
-        
+
         # Convert source accounts
-        source_accounts = []
-        for _, row in self.source_accounts.iterrows():
-            source_accounts.append({
-                "account_code": str(row['Account_Code']),
-                "account_description": str(row['Account_Description']),
-                "account_type": str(row['Account_Type']) if pd.notna(row['Account_Type']) else None,
-                "account_category": str(row['Account_Category']) if pd.notna(row['Account_Category']) else None,
-                "metadata": {}
-            })
-        
+        source_accounts = self._to_api_records(self.source_accounts, SOURCE_COLUMNS)
+        for account in source_accounts:
+            account["metadata"] = {}
+
         # Convert target accounts
-        target_accounts = []
-        for _, row in self.target_accounts.iterrows():
-            target_accounts.append({
-                "account_code": str(row['GL_Account']),
-                "account_description": str(row['GL_Description']),
-                "account_type": str(row['Account_Class']) if pd.notna(row['Account_Class']) else None,
-                "account_category": str(row['Sub_Class']) if pd.notna(row['Sub_Class']) else None,
-                "metadata": {
-                    "department": str(row['Department']) if pd.notna(row['Department']) else None,
-                    "cost_center": str(row['Cost_Center']) if pd.notna(row['Cost_Center']) else None
-                }
-            })
-        
+        target_accounts = self._to_api_records(self.target_accounts, TARGET_COLUMNS)
+
         return source_accounts, target_accounts
     
     async def test_api_health(self):
         """Test if API is available"""
         try:
-            session = await self.get_session()
-            async with session.get(f"{self.api_base_url}/health") as response:
+            async with self.session.get(f"{self.api_base_url}/health") as response:
                 if response.status == 200:
-                    health_data = await response.json()
+                    health_data = orjson.loads(await response.read())
                     print(f"✅ API is healthy: {health_data}")
                     return True
                 else:
@@ -89,173 +198,226 @@ class AccountMappingEvaluator:
             print(f"❌ Cannot connect to API: {str(e)}")
             return False
     
-    async def run_sample_evaluation(self, sample_size=5):
+    async def run_sample_evaluation(self, sample_size=5, sample_test_cases=None):
         """Run evaluation on a sample of test cases"""
         print(f"\n🧪 Running sample evaluation with {sample_size} test cases...")
         
-        # Get first N test cases
-        sample_test_cases = self.test_cases.head(sample_size)
-        
-        # Get corresponding source accounts
-        sample_source_accounts = []
-        for _, test_case in sample_test_cases.iterrows():
-            source_row = self.source_accounts[
-                self.source_accounts['Account_Code'] == test_case['Source_Account']
-            ].iloc[0]
-            
-            sample_source_accounts.append({
-                "account_code": str(source_row['Account_Code']),
-                "account_description": str(source_row['Account_Description']),
-                "account_type": str(source_row['Account_Type']) if pd.notna(source_row['Account_Type']) else None,
-                "account_category": str(source_row['Account_Category']) if pd.notna(source_row['Account_Category']) else None,
-                "metadata": {}
-            })
-        
-        # Prepare target accounts
-        _, target_accounts = self.prepare_api_data()
+        # Get first N test cases (unless the caller already materialized them)
+        if sample_test_cases is None:
+            sample_test_cases = self.test_cases.head(sample_size).reset_index(drop=True)
         
-        # Make API request
-        mapping_request = {
-            "source_accounts": sample_source_accounts,
-            "target_accounts": target_accounts,
-            "mapping_context": "Evaluation test - mapping FIS IO accounts to BNY Eagle accounts",
-            "confidence_threshold": 80
-        }
+        # Get corresponding source accounts (one hash join on the code index)
+        sample_rows = sample_test_cases[['Source_Account']].rename(
+            columns={'Source_Account': 'Account_Code'}
+        ).merge(self._source_by_code, left_on='Account_Code', right_index=True, how='left')
+        sample_source_accounts = self._to_api_records(sample_rows, SOURCE_COLUMNS)
+        for account in sample_source_accounts:
+            account["metadata"] = {}
         
+        # Make one API request per account, run concurrently (results keep submission order)
         try:
-            session = await self.get_session()
-            print("📡 Sending mapping request to API...")
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            print(f"📡 Sending {len(sample_source_accounts)} mapping requests to API...")
             
             start_time = time.time()
-            async with session.post(
+            responses = await asyncio.gather(*[
+                self._map_one(semaphore, source_account)
+                for source_account in sample_source_accounts
+            ])
+            processing_time = time.time() - start_time
+            
+            print(f"✅ Mapping completed in {processing_time:.2f} seconds")
+            return self._combine_results(responses, processing_time)
+        
+        except Exception as e:
+            print(f"❌ Error during API call: {str(e)}")
+            return None
+    
+    async def _map_one(self, semaphore, source_account):
+        """Map a single source account, bounded by the shared semaphore"""
+        mapping_request = {**self._base_request, "source_accounts": [source_account]}
+        
+        async with semaphore:
+            async with self.session.post(
                 f"{self.api_base_url}/map-accounts",
-                json=mapping_request,
-                headers={"Content-Type": "application/json"}
+                data=self._stream_mapping_request(mapping_request)
             ) as response:
-                
                 if response.status != 200:
                     error_text = await response.text()
-                    print(f"❌ API request failed: {response.status} - {error_text}")
-                    return None
-                
-                result = await response.json()
-                processing_time = time.time() - start_time
-                
-                print(f"✅ Mapping completed in {processing_time:.2f} seconds")
-                return result
+                    raise Exception(f"API request failed: {response.status} - {error_text}")
+                return orjson.loads(await response.read())
+    
+    @staticmethod
+    async def _stream_mapping_request(mapping_request):
+        """Yield the request as JSON, emitting target accounts in chunks (chunked transfer)"""
+        target_accounts = mapping_request["target_accounts"]
+        head = {key: value for key, value in mapping_request.items() if key != "target_accounts"}
         
-        except Exception as e:
-            print(f"❌ Error during API call: {str(e)}")
-            return None
+        yield orjson.dumps(head)[:-1] + b',"target_accounts":['
+        for start in range(0, len(target_accounts), STREAM_CHUNK_SIZE):
+            chunk = orjson.dumps(target_accounts[start:start + STREAM_CHUNK_SIZE])[1:-1]
+            yield chunk if start == 0 else b"," + chunk
+        yield b"]}"
+    
+    @staticmethod
+    def _combine_results(responses, processing_time):
+        """Merge per-account /map-accounts responses into a single result"""
+        results = [result for response in responses for result in response['results']]
+        confidences = [result['confidence_score'] for result in results]
+        high_confidence_count = sum(1 for c in confidences if c >= CONFIDENCE_THRESHOLD)
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        
+        return {
+            "session_ids": [response['session_id'] for response in responses],
+            "results": results,
+            "summary": {
+                "total_mappings": len(results),
+                "high_confidence_mappings": high_confidence_count,
+                "average_confidence": round(avg_confidence, 1),
+                "processing_time": round(processing_time, 2),
+                "confidence_threshold": CONFIDENCE_THRESHOLD
+            },
+            "status": "completed"
+        }
     
     def analyze_results(self, api_result, sample_test_cases):
         """Analyze the API results against expected outcomes"""
         if not api_result:
             return
         
-        print("\n📊 Analyzing Results...")
-        print("=" * 60)
+        # Collected and written in one go rather than flushing per print()
+        lines = []
+        lines.append("\n📊 Analyzing Results...")
+        lines.append("=" * 60)
         
         results = api_result['results']
         summary = api_result['summary']
         
         # Overall summary
-        print(f"Total Mappings: {summary['total_mappings']}")
-        print(f"High Confidence Mappings: {summary['high_confidence_mappings']}")
-        print(f"Average Confidence: {summary['average_confidence']}%")
-        print(f"Processing Time: {summary['processing_time']} seconds")
-        print(f"Confidence Threshold: {summary['confidence_threshold']}%")
+        lines.append(f"Total Mappings: {summary['total_mappings']}")
+        lines.append(f"High Confidence Mappings: {summary['high_confidence_mappings']}")
+        lines.append(f"Average Confidence: {summary['average_confidence']}%")
+        lines.append(f"Processing Time: {summary['processing_time']} seconds")
+        lines.append(f"Confidence Threshold: {summary['confidence_threshold']}%")
         
-        print("\n📋 Detailed Results:")
-        print("-" * 60)
+        lines.append("\n📋 Detailed Results:")
+        lines.append("-" * 60)
         
-        correct_mappings = 0
         total_mappings = len(results)
         
-        for i, result in enumerate(results):
-            test_case = sample_test_cases.iloc[i]
-            expected_target = test_case['Expected_Target']
-            actual_target = result['target_account_code']
-            
-            is_correct = actual_target == expected_target
-            if is_correct:
-                correct_mappings += 1
-            
+        # Pull result fields and expectations into parallel columns once
+        rows = list(map(RESULT_FIELDS, results))
+        expected_targets = sample_test_cases['Expected_Target'].tolist()[:total_mappings]
+        
+        # Score all mappings in one comparison; the loop below only reports
+        actuals = np.array([row[1] for row in rows], dtype=object)
+        correct_mask = actuals == np.array(expected_targets, dtype=object)
+        correct_mappings = int(correct_mask.sum())
+        
+        # Confidence distribution from the per-result scores
+        confidences = np.fromiter((row[2] for row in rows), dtype=np.float32, count=total_mappings)
+        if total_mappings:
+            median_confidence = float(np.median(confidences))
+            high_confidence_rate = float((confidences >= summary['confidence_threshold']).mean()) * 100
+        else:
+            median_confidence = high_confidence_rate = 0.0
+        
+        for is_correct, expected_target, (source_code, actual_target, confidence, reasoning, alternatives) in zip(
+            correct_mask, expected_targets, rows
+        ):
             status_icon = "✅" if is_correct else "❌"
             
-            print(f"{status_icon} {result['source_account_code']}: {actual_target}")
-            print(f"   Expected: {expected_target}")
-            print(f"   Confidence: {result['confidence_score']}%")
-            print(f"   Reasoning: {result['reasoning'][:100]}...")
-            if result['alternatives']:
-                print(f"   Alternatives: {', '.join(result['alternatives'])}")
-            print()
+            lines.append(f"{status_icon} {source_code}: {actual_target}")
+            lines.append(f"   Expected: {expected_target}")
+            lines.append(f"   Confidence: {confidence}%")
+            lines.append(f"   Reasoning: {reasoning[:100]}...")
+            if alternatives:
+                lines.append(f"   Alternatives: {', '.join(alternatives)}")
+            lines.append("")
         
         # Calculate accuracy
         accuracy = (correct_mappings / total_mappings) * 100 if total_mappings > 0 else 0
         
-        print("=" * 60)
-        print(f"🎯 EVALUATION SUMMARY")
-        print("=" * 60)
-        print(f"Accuracy: {accuracy:.1f}% ({correct_mappings}/{total_mappings})")
-        print(f"Average Confidence: {summary['average_confidence']}%")
-        print(f"High Confidence Rate: {(summary['high_confidence_mappings']/total_mappings)*100:.1f}%")
-        print(f"Processing Speed: {summary['processing_time']/total_mappings:.2f}s per mapping")
-        print("=" * 60)
+        lines.append("=" * 60)
+        lines.append(f"🎯 EVALUATION SUMMARY")
+        lines.append("=" * 60)
+        lines.append(f"Accuracy: {accuracy:.1f}% ({correct_mappings}/{total_mappings})")
+        lines.append(f"Average Confidence: {summary['average_confidence']}%")
+        lines.append(f"Median Confidence: {median_confidence:.1f}%")
+        lines.append(f"High Confidence Rate: {high_confidence_rate:.1f}%")
+        lines.append(f"Processing Speed: {summary['processing_time']/total_mappings:.2f}s per mapping")
+        lines.append("=" * 60)
         
         # Success criteria check
-        print("\n🏆 SUCCESS CRITERIA:")
-        print(f"✅ Minimum Accuracy (85%): {'PASSED' if accuracy >= 85 else 'FAILED'}")
-        print(f"✅ Average Confidence (80%): {'PASSED' if summary['average_confidence'] >= 80 else 'FAILED'}")
-        print(f"✅ Processing Speed (<2s): {'PASSED' if (summary['processing_time']/total_mappings) < 2 else 'FAILED'}")
+        lines.append("\n🏆 SUCCESS CRITERIA:")
+        lines.append(f"✅ Minimum Accuracy (85%): {'PASSED' if accuracy >= 85 else 'FAILED'}")
+        lines.append(f"✅ Average Confidence (80%): {'PASSED' if summary['average_confidence'] >= 80 else 'FAILED'}")
+        lines.append(f"✅ Processing Speed (<2s): {'PASSED' if (summary['processing_time']/total_mappings) < 2 else 'FAILED'}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         return {
             "accuracy": accuracy,
             "average_confidence": summary['average_confidence'],
+            "median_confidence": median_confidence,
             "processing_time_per_mapping": summary['processing_time']/total_mappings,
-            "high_confidence_rate": (summary['high_confidence_mappings']/total_mappings)*100
+            "high_confidence_rate": high_confidence_rate
         }
     
+    @staticmethod
+    def _write_json_sections(path, sections):
+        """Write a top-level JSON object to disk one section at a time"""
+        options = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        with open(path, 'wb') as f:
+            f.write(b"{")
+            for i, (key, value) in enumerate(sections.items()):
+                if i:
+                    f.write(b",")
+                f.write(b"\n  " + orjson.dumps(key) + b": ")
+                # orjson escapes newlines inside strings, so raw newlines are only indentation
+                f.write(orjson.dumps(value, option=options).replace(b"\n", b"\n  "))
+            f.write(b"\n}\n")
+    
     async def run_full_evaluation(self):
         """Run the complete evaluation suite"""
         print("🚀 Starting Full Account Mapping Evaluation...\n")
         
-        # Load test data
-        self.load_test_data()
-        
-        # Test API connectivity
-        if not await self.test_api_health():
+        # Load test data (in a thread) while testing API connectivity
+        _, healthy = await asyncio.gather(
+            asyncio.to_thread(self.load_test_data),
+            self.test_api_health(),
+        )
+        if not healthy:
             print("❌ Cannot proceed - API is not available")
             return
         
         # Run sample evaluation (first 10 test cases)
         sample_size = min(10, len(self.test_cases))
-        api_result = await self.run_sample_evaluation(sample_size)
+        # Materialized once and shared by the request build and the analysis
+        self._sample_rows = self.test_cases.head(sample_size).reset_index(drop=True)
+        api_result = await self.run_sample_evaluation(sample_size, self._sample_rows)
         
         if api_result:
-            sample_test_cases = self.test_cases.head(sample_size)
+            sample_test_cases = self._sample_rows
             analysis = self.analyze_results(api_result, sample_test_cases)
             
             # Save results
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             results_file = self.test_data_path / f"evaluation_results_{timestamp}.json"
             
-            with open(results_file, 'w') as f:
-                json.dump({
-                    "timestamp": datetime.now().isoformat(),
-                    "api_result": api_result,
-                    "analysis": analysis,
-                    "test_cases_used": sample_test_cases.to_dict('records')
-                }, f, indent=2)
+            self._write_json_sections(results_file, {
+                "timestamp": datetime.now().isoformat(),
+                "api_result": api_result,
+                "analysis": analysis,
+                "test_cases_used": sample_test_cases.to_dict('records')
+            })
             
             print(f"\n💾 Results saved to: {results_file}")
         
-        await self.close_session()
         print("\n🎉 Evaluation completed!")
 
 async def main():
-    evaluator = AccountMappingEvaluator()
-    await evaluator.run_full_evaluation()
+    async with AccountMappingEvaluator() as evaluator:
+        await evaluator.run_full_evaluation()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
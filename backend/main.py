@@ -1,17 +1,35 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager, suppress
+from collections import namedtuple
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
 import asyncio
-import aiohttp
-import json
+import httpx
+import orjson
+import redis.asyncio as redis
 import os
+import re
+import hashlib
+import math
+import random
+import tempfile
+import time
+from itertools import islice
 import uuid
 from datetime import datetime
 import logging
-from io import StringIO, BytesIO
+from io import BytesIO
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from rapidfuzz import fuzz, process, utils
 
 # Load environment variables
 load_dotenv()
@@ -20,33 +38,184 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def dumps_json(value: Any) -> bytes:
+    """orjson-encode, falling back to str() for values like pandas Timestamps"""
+    return orjson.dumps(value, default=str)
+
+def dumps_prompt_json(value: Any) -> str:
+    """Indented JSON text for embedding in prompts"""
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2, default=str).decode()
+
 # Load Eagle account reference data
 eagle_account_reference = {}
 ground_truth_mappings = []
+reference_prompt = ""  # Static system prompt section, rebuilt whenever the reference data loads
+
+# Ground truth search fields, lowercased once at load; `mapping` is the record returned to clients
+GroundTruthSearchRow = namedtuple('GroundTruthSearchRow', 'source_code source_description mapping_type confidence mapping')
+ground_truth_search_rows = []
+
+def build_reference_prompt() -> str:
+    """System prompt section describing the Eagle targets and ground truth patterns"""
+    prompt = ""
+
+    # Add Eagle target account reference
+    if eagle_account_reference:
+        prompt += f"""
+
+EAGLE TARGET ACCOUNT STRUCTURE:
+Total Available Accounts: {eagle_account_reference.get('total_accounts', 0)}
+
+Account Classes Available:
+"""
+        all_accounts = eagle_account_reference.get('all_accounts', [])
+        for class_name, class_data in eagle_account_reference.get('account_classes', {}).items():
+            prompt += f"\n{class_name} Accounts:"
+            # Sub classes list indices into all_accounts
+            for sub_class, account_indices in class_data.get('sub_classes', {}).items():
+                prompt += f"\n  - {sub_class}: {len(account_indices)} accounts"
+                # Show sample accounts for each sub-class
+                for index in account_indices[:2]:  # Show first 2 accounts as examples
+                    account = all_accounts[index]
+                    prompt += f"\n    • {account['account_code']}: {account['description']}"
+
+    # Add ground truth mapping patterns
+    if ground_truth_mappings:
+        prompt += f"""
+
+GROUND TRUTH MAPPING PATTERNS ({len(ground_truth_mappings)} verified patterns):
+These are authoritative, verified mappings that should guide your decisions.
+
+USAGE PRIORITY:
+1. EXACT MATCHES: If source account exactly matches ground truth, use that mapping (95-98% confidence)
+2. PATTERN MATCHES: If source account follows similar pattern, adapt the mapping (85-94% confidence)  
+3. ANALOGOUS MAPPINGS: Use as examples for similar account types (70-84% confidence)
+
+SAMPLE PATTERNS BY TYPE:"""
+        
+        # Group by mapping type
+        mapping_types = {}
+        for mapping in ground_truth_mappings:
+            mapping_type = mapping.get('Mapping_Type', 'Other')
+            if mapping_type not in mapping_types:
+                mapping_types[mapping_type] = []
+            mapping_types[mapping_type].append(mapping)
+        
+        # Show examples from each type
+        for mapping_type, mappings in mapping_types.items():
+            prompt += f"""
+
+{mapping_type.upper()} MAPPINGS:"""
+            for mapping in mappings[:3]:  # Show top 3 per type
+                prompt += f"""
+  {mapping['Source_Account_Code']} -> {mapping['Target_Account_Code']} ({mapping['Mapping_Confidence']}%)
+  Source: {mapping['Source_Description']}
+  Target: {mapping['Target_Description']}
+  Notes: {mapping['Notes']}"""
+
+    return prompt
 
 def load_reference_data():
-    global eagle_account_reference, ground_truth_mappings
+    global eagle_account_reference, ground_truth_mappings, ground_truth_search_rows, reference_prompt
     
     try:
         # Load Eagle account structure
-        with open('eagle_account_reference.json', 'r') as f:
-            eagle_account_reference = json.load(f)
+        with open('eagle_account_reference.json', 'rb') as f:
+            eagle_account_reference = orjson.loads(f.read())
         logger.info(f"Loaded Eagle account reference with {eagle_account_reference.get('total_accounts', 0)} accounts")
         
         # Load ground truth mappings for pattern learning
         mappings_df = pd.read_csv('test-data/ground-truth-mappings.csv')
         ground_truth_mappings = mappings_df.to_dict('records')
+        ground_truth_search_rows = [
+            GroundTruthSearchRow(str(code).lower(), str(description).lower(), str(mapping_type).lower(), confidence, mapping)
+            for code, description, mapping_type, confidence, mapping in zip(
+                mappings_df['Source_Account_Code'],
+                mappings_df['Source_Description'],
+                mappings_df['Mapping_Type'],
+                mappings_df['Mapping_Confidence'],
+                ground_truth_mappings
+            )
+        ]
         logger.info(f"Loaded {len(ground_truth_mappings)} ground truth mapping patterns")
         
     except Exception as e:
         logger.warning(f"Could not load reference data: {e}")
         eagle_account_reference = {}
         ground_truth_mappings = []
+        ground_truth_search_rows = []
+    
+    reference_prompt = build_reference_prompt()
+
+MAPPING_SYSTEM_PROMPT = """You are Claude, an AI assistant specialized in accounting cross-reference mapping between FIS IO ledger accounts and BNY Eagle accounting systems.
+
+CRITICAL INSTRUCTION: When providing mapping suggestions, respond ONLY with structured mapping data in the exact required format. Do not include conversational responses, analysis, or commentary.
+
+MAPPING CONTEXT:
+You are specifically helping map accounts FROM FIS IO ledger TO BNY Eagle chart of accounts.
+
+TARGET SYSTEM: BNY Eagle Account Structure
+- Account Code Format: 6-digit numeric (e.g., 101000, 102100)
+- Hierarchy: Account Class > Sub Class > Individual Accounts
+- Main Account Classes: Asset, Liability, Equity, Revenue, Expense
+
+CONFIDENCE SCORING:
+- 95-98%: Direct matches (exact functional equivalents)
+- 85-94%: Semantic matches (similar function, different naming)
+- 70-84%: Consolidated matches (multiple source accounts to one target)
+
+REQUIRED RESPONSE FORMAT for mapping requests:
+Provide mappings ONLY in this exact format:
+
+SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
+SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
+SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
+
+Example:
+1000 -> 101000 (95%) # Cash and Cash Equivalents -> Cash - Operating Account
+1010 -> 101100 (89%) # Checking Account -> Cash - Checking Account
+1020 -> 101200 (92%) # Savings Account -> Cash - Savings Account
+
+DO NOT include:
+- Conversational greetings or closings
+- Detailed explanations or analysis sections
+- Recommendations or suggestions
+- Additional commentary about the mapping process
+- Data quality assessments
+- Implementation approaches
+
+Focus solely on providing accurate, structured mapping data that can be directly parsed and imported into the mapping grid."""
+
+CHAT_SYSTEM_PROMPT = """You are Claude, a helpful AI assistant specializing in accounting and finance. You can help with:
+
+- General questions about accounting principles and practices
+- Explanations of financial concepts and terminology  
+- Guidance on account mapping and cross-referencing between systems
+- Analysis and discussion of financial data and structures
+- Support for accounting system migrations and implementations
+
+You are knowledgeable about both FIS IO ledger systems and BNY Eagle accounting structures. When users ask general questions or need explanations, provide clear, conversational responses with helpful context and examples.
+
+Be conversational, informative, and supportive. Only provide structured mapping data when explicitly requested to perform account mappings."""
 
 # Load reference data on startup
 load_reference_data()
 
-app = FastAPI(title="Account Mapping API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the Claude connection pool up front so the first request doesn't pay for it
+    await claude_client.open()
+    redis_client = redis.from_url(REDIS_URL) if REDIS_URL else None
+    for store in (mapping_sessions, evaluation_results, uploaded_files_data):
+        store.redis = redis_client
+    upload_sweeper = asyncio.create_task(sweep_uploads_periodically())
+    yield
+    upload_sweeper.cancel()
+    await claude_client.close()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+app = FastAPI(title="Account Mapping API", version="1.0.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -57,17 +226,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class EventStreamAwareGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message):
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith("text/event-stream"):
+                # gzip would hold server-sent events in its buffer; pass them through as-is
+                self.content_encoding_set = True
+
+class EventStreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves text/event-stream responses uncompressed"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = EventStreamAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+# Compress larger responses (uploaded account lists, ground truth) for the browser
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=1024)
+
 # Pydantic models
 class AccountData(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     account_code: str
     account_description: str
     account_type: Optional[str] = None
     account_category: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = {}
 
+# Dumps a whole list of accounts in one pass instead of .dict() per model
+ACCOUNT_LIST_ADAPTER = TypeAdapter(List[AccountData])
+
+class TargetAccountData(AccountData):
+    department: Optional[str] = None
+    cost_center: Optional[str] = None
+
 class MappingRequest(BaseModel):
     source_accounts: List[AccountData]
-    target_accounts: List[AccountData]
+    target_accounts: List[TargetAccountData]
     mapping_context: Optional[str] = None
     confidence_threshold: Optional[int] = 80
 
@@ -89,10 +289,221 @@ class EvaluationRequest(BaseModel):
     test_cases: List[Dict[str, Any]]
     ground_truth: List[Dict[str, Any]]
 
-# In-memory storage (in production, use Redis or database)
-mapping_sessions = {}
-evaluation_results = {}
-uploaded_files_data = {}  # Store uploaded file data with session IDs
+# Session storage: shared Redis when REDIS_URL is set (needed with several workers), else in-process
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+class SessionStore:
+    """Session records keyed by id.
+
+    In Redis each record is a hash of orjson-encoded fields, so per-field updates
+    don't re-serialize the whole record; list fields live in their own Redis list.
+    """
+
+    def __init__(self, prefix: str, list_fields: tuple = (), maxsize: int = 1024, ttl: int = SESSION_TTL_SECONDS):
+        self.prefix = prefix
+        self.list_fields = list_fields
+        self.ttl = ttl
+        self.redis = None  # set in lifespan when REDIS_URL is configured
+        # In-process fallback is bounded like Redis: LRU eviction plus expiry
+        self._local: Dict[str, Dict[str, Any]] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}"
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if self.redis is None:
+            return self._local.get(session_id)
+        key = self._key(session_id)
+        fields = await self.redis.hgetall(key)
+        if not fields:
+            return None
+        record = {name.decode(): orjson.loads(value) for name, value in fields.items()}
+        for field in self.list_fields:
+            record[field] = [orjson.loads(item) for item in await self.redis.lrange(f"{key}:{field}", 0, -1)]
+        return record
+
+    async def set(self, session_id: str, record: Dict[str, Any]):
+        if self.redis is None:
+            self._local[session_id] = record
+            return
+        key = self._key(session_id)
+        fields = {name: dumps_json(value) for name, value in record.items() if name not in self.list_fields}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key, *(f"{key}:{field}" for field in self.list_fields))
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, self.ttl)
+            for field in self.list_fields:
+                if record.get(field):
+                    pipe.rpush(f"{key}:{field}", *(dumps_json(item) for item in record[field]))
+                    pipe.expire(f"{key}:{field}", self.ttl)
+            await pipe.execute()
+
+    def _local_record(self, session_id: str) -> Dict[str, Any]:
+        """The in-process record, recreated if it expired, as Redis recreates a missing hash on write"""
+        record = self._local.get(session_id)
+        if record is None:
+            record = self._local[session_id] = {}
+        return record
+
+    async def update(self, session_id: str, **fields):
+        if self.redis is None:
+            self._local_record(session_id).update(fields)
+            return
+        key = self._key(session_id)
+        # A write after expiry recreates the hash, so it needs an expiry of its own
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={name: dumps_json(value) for name, value in fields.items()})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def increment(self, session_id: str, field: str, amount: int = 1):
+        if self.redis is None:
+            record = self._local_record(session_id)
+            record[field] = record.get(field, 0) + amount
+            return
+        key = self._key(session_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # orjson-encoded ints are plain decimal strings, which HINCRBY operates on directly
+            pipe.hincrby(key, field, amount)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def append(self, session_id: str, field: str, *values: Any):
+        if self.redis is None:
+            self._local_record(session_id).setdefault(field, []).extend(values)
+            return
+        list_key = f"{self._key(session_id)}:{field}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(list_key, *(dumps_json(value) for value in values))
+            pipe.expire(list_key, self.ttl)
+            await pipe.execute()
+
+# Uploaded accounts live in per-session Feather files rather than in the session record
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "account-mapping-uploads"))
+UPLOAD_CLEANUP_INTERVAL_SECONDS = int(os.getenv("UPLOAD_CLEANUP_INTERVAL_SECONDS", "600"))
+
+def save_uploaded_accounts(session_id: str, accounts: List[Dict[str, Any]]) -> str:
+    """Write uploaded accounts to a Feather file and return its path"""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # Explicit schema: inference would sort the metadata keys and lose the upload's column order
+    metadata_columns = list(accounts[0]["metadata"]) if accounts else []
+    schema = pa.schema(
+        [(field, pa.string()) for field in AccountData.model_fields if field != "metadata"]
+        + [("metadata", pa.struct([(column, pa.string()) for column in metadata_columns]))]
+    )
+    path = os.path.join(UPLOAD_DIR, f"{session_id}.arrow")
+    feather.write_feather(pa.Table.from_pylist(accounts, schema=schema), path)
+    return path
+
+def load_uploaded_accounts(path: str) -> List[Dict[str, Any]]:
+    """Read back the account dicts written by save_uploaded_accounts"""
+    return feather.read_table(path, memory_map=True).to_pylist()
+
+def remove_expired_uploads():
+    """Delete upload files older than the session TTL, since their sessions are gone too"""
+    cutoff = time.time() - SESSION_TTL_SECONDS
+    # Other workers sweep the same directory, so a file can vanish between listing and removal
+    with suppress(FileNotFoundError):
+        for entry in os.scandir(UPLOAD_DIR):
+            with suppress(FileNotFoundError):
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+
+async def sweep_uploads_periodically():
+    """Run remove_expired_uploads on a timer, off the upload request path"""
+    while True:
+        try:
+            await asyncio.to_thread(remove_expired_uploads)
+        except OSError as e:
+            logger.warning(f"Upload cleanup failed: {str(e)}")
+        await asyncio.sleep(UPLOAD_CLEANUP_INTERVAL_SECONDS)
+
+mapping_sessions = SessionStore("mapping", list_fields=("results",), maxsize=1024, ttl=2 * SESSION_TTL_SECONDS)
+evaluation_results = SessionStore("evaluation", maxsize=256)
+uploaded_files_data = SessionStore("upload", maxsize=512)  # Store uploaded file data with session IDs
+
+# Maximum number of Claude requests in flight per /map-accounts call
+CLAUDE_CONCURRENCY = int(os.getenv("CLAUDE_CONCURRENCY", "8"))
+# Source accounts mapped per Claude request, sharing one copy of the target list
+CLAUDE_BATCH_SIZE = int(os.getenv("CLAUDE_BATCH_SIZE", "20"))
+# Claude mapping results reused for identical source/target/context inputs
+MAPPING_CACHE_SIZE = int(os.getenv("MAPPING_CACHE_SIZE", "4096"))
+MAPPING_CACHE_TTL_SECONDS = int(os.getenv("MAPPING_CACHE_TTL_SECONDS", "3600"))
+
+# Lexical prefilter: an unambiguous description match skips Claude, otherwise Claude only sees the top candidates
+FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "95"))
+# How far the direct match must score above the next-best target
+FUZZY_MATCH_MARGIN = float(os.getenv("FUZZY_MATCH_MARGIN", "5"))
+FUZZY_TOP_K = int(os.getenv("FUZZY_TOP_K", "10"))
+
+def target_fingerprint(target_accounts: List[AccountData]) -> str:
+    """Order-independent hash of a target account list, for mapping cache keys"""
+    entries = sorted(f"{acc.account_code}\t{acc.account_description}\t{acc.account_type}" for acc in target_accounts)
+    return hashlib.blake2b("\n".join(entries).encode(), digest_size=8).hexdigest()
+
+class MappingTargets:
+    """A mapping request's target accounts plus what is derived from them, computed once per request"""
+
+    def __init__(self, accounts: List[AccountData]):
+        self.accounts = accounts
+        self.fingerprint = target_fingerprint(accounts)
+        self.descriptions = [acc.account_description for acc in accounts]
+        # Leading code digit is the account class in both ledgers (1 assets, 2 liabilities, ...)
+        self.code_prefixes = np.array([acc.account_code[:1] for acc in accounts])
+        # Prompt line per target, rendered once and joined into each batch's shortlist
+        self.lines = [
+            f"{acc.account_code}: {acc.account_description} ({acc.account_type or 'Unknown'})"
+            for acc in accounts
+        ]
+
+    def rank(self, source_accounts: List[AccountData]) -> tuple:
+        """Strict description similarity (0-100) per source and target, and each source's top target indices"""
+        descriptions = [acc.account_description for acc in source_accounts]
+        # token_set_ratio scores 100 whenever one description's words are a subset of the
+        # other's: good for recalling candidates, too loose to map on, which uses token_sort_ratio
+        recall_scores = process.cdist(descriptions, self.descriptions, scorer=fuzz.token_set_ratio, processor=utils.default_process)
+        ranked = np.argsort(-recall_scores, axis=1, kind="stable")[:, :FUZZY_TOP_K]
+        match_scores = process.cdist(descriptions, self.descriptions, scorer=fuzz.token_sort_ratio, processor=utils.default_process)
+        return match_scores, ranked
+
+    def direct_match(self, source: AccountData, scores: np.ndarray) -> Optional[int]:
+        """Index of the target a source clearly matches on description and code prefix, else None"""
+        order = np.argsort(-scores, kind="stable")
+        best = scores[order[0]]
+        runner_up = scores[order[1]] if len(order) > 1 else 0
+        if best < FUZZY_MATCH_THRESHOLD or best - runner_up < FUZZY_MATCH_MARGIN:
+            return None
+        if not source.account_code or self.code_prefixes[order[0]] != source.account_code[:1]:
+            return None
+        return order[0]
+
+# Fields of the structured single-account mapping response
+MAPPING_RE = re.compile(r'MAPPING:\s*([^\n]+)', re.IGNORECASE)
+CONFIDENCE_RE = re.compile(r'CONFIDENCE:\s*(\d+)', re.IGNORECASE)
+REASONING_RE = re.compile(r'REASONING:\s*([^\n]+(?:\n(?!ALTERNATIVES:)[^\n]+)*)', re.IGNORECASE)
+ALTERNATIVES_RE = re.compile(r'ALTERNATIVES:\s*([^\n]+)', re.IGNORECASE)
+# JSON array returned for batched mappings, usually inside a ```json fence
+JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*(.*?)```', re.DOTALL)
+
+# Timeouts, rate limiting, transient server errors and overload are worth retrying
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+MAX_BACKOFF_SECONDS = 30
+
+def should_retry(status_code: int) -> bool:
+    return status_code in RETRYABLE_STATUS_CODES
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After (up to the same cap)"""
+    wait_time = random.uniform(0, min(MAX_BACKOFF_SECONDS, (2 ** attempt) * 2))
+    try:
+        server_delay = float(retry_after) if retry_after else 0.0
+    except ValueError:  # HTTP-date form; fall back to our own delay
+        return wait_time
+    if not math.isfinite(server_delay):
+        return wait_time
+    # A long Retry-After would hold the request, and its concurrency slot, past any client timeout
+    return max(wait_time, min(server_delay, MAX_BACKOFF_SECONDS))
 
 class ClaudeAPIClient:
     def __init__(self):
@@ -101,30 +512,35 @@ class ClaudeAPIClient:
             logger.warning("CLAUDE_API_KEY environment variable not set - API calls will fail")
             self.api_key = "dummy-key-for-testing"
         
-        self.api_url = "https://api.anthropic.com/v1/messages"
-        self.session = None
+        self.api_url = "/v1/messages"
+        self.client = None
+        self.mapping_cache = TTLCache(maxsize=MAPPING_CACHE_SIZE, ttl=MAPPING_CACHE_TTL_SECONDS)
     
-    async def get_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                headers={
-                    "Content-Type": "application/json",
-                    "x-api-key": self.api_key,
-                    "anthropic-version": "2023-06-01"
-                }
-            )
-        return self.session
+    async def open(self):
+        """Create the shared HTTP client; called once from the app lifespan"""
+        # HTTP/2 multiplexes concurrent Claude requests over a single TLS connection
+        self.client = httpx.AsyncClient(
+            base_url="https://api.anthropic.com",
+            http2=True,
+            headers={
+                "Content-Type": "application/json",
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01"
+            },
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60),
+            timeout=httpx.Timeout(60.0)
+        )
     
-    async def close_session(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+    async def get_client(self):
+        return self.client
     
-    async def chat_completion(self, messages: List[Dict[str, str]], system_prompt: str = None, max_retries: int = 3) -> str:
-        """Send a chat completion request to Claude API with retry logic"""
-        session = await self.get_session()
-        
-        # Prepare the request payload
+    async def close_client(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+    
+    def build_payload(self, messages: List[Dict[str, str]], system_prompt: str = None, stream: bool = False) -> Dict[str, Any]:
+        """Prepare the Messages API request payload"""
         payload = {
             "model": "claude-3-5-sonnet-20241022",
             "max_tokens": 4000,
@@ -133,61 +549,96 @@ class ClaudeAPIClient:
         
         if system_prompt:
             payload["system"] = system_prompt
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    async def chat_completion(self, messages: List[Dict[str, str]], system_prompt: str = None, max_retries: int = 3) -> str:
+        """Send a chat completion request to Claude API with retry logic"""
+        client = await self.get_client()
+        payload = self.build_payload(messages, system_prompt)
         
         for attempt in range(max_retries):
             try:
-                async with session.post(self.api_url, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        # Extract content from Claude's response
-                        if 'content' in result and len(result['content']) > 0:
-                            return result['content'][0]['text']
-                        else:
-                            raise Exception("No content in Claude response")
-                    
-                    elif response.status == 529:  # Overloaded
-                        error_text = await response.text()
-                        logger.warning(f"Claude API overloaded (attempt {attempt + 1}/{max_retries}): {error_text}")
-                        if attempt < max_retries - 1:
-                            wait_time = (2 ** attempt) * 2  # Exponential backoff: 2, 4, 8 seconds
-                            logger.info(f"Waiting {wait_time} seconds before retry...")
+                response = await client.post(self.api_url, content=orjson.dumps(payload))
+            except httpx.TimeoutException:
+                logger.warning(f"Timeout on attempt {attempt + 1}/{max_retries}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                raise Exception("Request timeout after multiple retries")
+            except httpx.HTTPError as e:
+                logger.error(f"Error calling Claude API: {str(e)}")
+                raise Exception(f"Failed to get response from Claude: {str(e)}")
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                # Extract content from Claude's response
+                if 'content' in result and len(result['content']) > 0:
+                    return result['content'][0]['text']
+                raise Exception("Failed to get response from Claude: No content in Claude response")
+            
+            error_text = response.text
+            if should_retry(response.status_code) and attempt < max_retries - 1:
+                wait_time = backoff_delay(attempt, response.headers.get("retry-after"))
+                logger.warning(f"Claude API returned {response.status_code} (attempt {attempt + 1}/{max_retries}), retrying in {wait_time:.1f}s: {error_text}")
+                await asyncio.sleep(wait_time)
+                continue
+            
+            if response.status_code == 529:  # Overloaded
+                raise Exception("Failed to get response from Claude: Claude API is overloaded. Please try again later.")
+            logger.error(f"Claude API error: {response.status_code} - {error_text}")
+            raise Exception(f"Failed to get response from Claude: Claude API error: {response.status_code}")
+        
+        raise Exception("Max retries exceeded")
+
+    async def chat_stream(self, messages: List[Dict[str, str]], system_prompt: str = None, max_retries: int = 3):
+        """Stream a chat completion from Claude, yielding text deltas as they arrive.
+
+        Failures are retried like chat_completion, but only before any text has been yielded.
+        """
+        client = await self.get_client()
+        body = orjson.dumps(self.build_payload(messages, system_prompt, stream=True))
+        
+        for attempt in range(max_retries):
+            started = False
+            try:
+                async with client.stream("POST", self.api_url, content=body) as response:
+                    if response.status_code != 200:
+                        error_text = (await response.aread()).decode(errors="replace")
+                        if should_retry(response.status_code) and attempt < max_retries - 1:
+                            wait_time = backoff_delay(attempt, response.headers.get("retry-after"))
+                            logger.warning(f"Claude API returned {response.status_code} (attempt {attempt + 1}/{max_retries}), retrying in {wait_time:.1f}s: {error_text}")
                             await asyncio.sleep(wait_time)
                             continue
-                        else:
-                            raise Exception("Claude API is overloaded. Please try again later.")
+                        logger.error(f"Claude API error: {response.status_code} - {error_text}")
+                        raise Exception(f"Failed to get response from Claude: Claude API error: {response.status_code}")
                     
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Claude API error: {response.status} - {error_text}")
-                        raise Exception(f"Claude API error: {response.status}")
-                        
-            except asyncio.TimeoutError:
+                    # Server-sent events; only text deltas and errors matter here
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        event = orjson.loads(line[5:])
+                        if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                            started = True
+                            yield event["delta"]["text"]
+                        elif event.get("type") == "error":
+                            raise Exception(f"Failed to get response from Claude: {event['error'].get('message')}")
+                    return
+            except httpx.TimeoutException:
                 logger.warning(f"Timeout on attempt {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+                if not started and attempt < max_retries - 1:
+                    await asyncio.sleep(backoff_delay(attempt))
                     continue
-                else:
-                    raise Exception("Request timeout after multiple retries")
-            except Exception as e:
-                if "overloaded" in str(e).lower() or "529" in str(e):
-                    if attempt < max_retries - 1:
-                        wait_time = (2 ** attempt) * 2
-                        logger.info(f"Retrying after {wait_time} seconds due to overload...")
-                        await asyncio.sleep(wait_time)
-                        continue
+                raise Exception("Request timeout after multiple retries")
+            except httpx.HTTPError as e:
                 logger.error(f"Error calling Claude API: {str(e)}")
                 raise Exception(f"Failed to get response from Claude: {str(e)}")
         
         raise Exception("Max retries exceeded")
 
-    async def map_account(self, source_account: AccountData, target_accounts: List[AccountData], context: str = None) -> Dict[str, Any]:
-        """Map a single account using Claude API"""
-        
-        # Create target accounts list for prompt
-        target_list = "\n".join([
-            f"{acc.account_code}: {acc.account_description} ({acc.account_type or 'Unknown'})"
-            for acc in target_accounts
-        ])
+    async def map_account(self, source_account: AccountData, target_list: str, context: str = None) -> Dict[str, Any]:
+        """Map a single account using Claude API, given the rendered target accounts list"""
         
         # Create detailed prompt
         prompt = f"""As an expert accountant, map this source account to the most appropriate target account.
@@ -219,14 +670,134 @@ Consider account functionality, business purpose, and financial statement classi
             logger.error(f"Error calling Claude API: {str(e)}")
             raise HTTPException(status_code=500, detail=f"API call failed: {str(e)}")
     
+    async def map_accounts_batch(self, source_accounts: List[AccountData], targets: MappingTargets, context: str = None) -> List[Dict[str, Any]]:
+        """Map several accounts, reusing cached results; results are in source order"""
+        keys = [
+            (acc.account_code, acc.account_description, acc.account_type, acc.account_category, targets.fingerprint, context)
+            for acc in source_accounts
+        ]
+        results = [self.mapping_cache.get(key) for key in keys]
+        
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            mapped = await self._map_accounts_uncached([source_accounts[i] for i in misses], targets, context)
+            for i, result in zip(misses, mapped):
+                results[i] = self.mapping_cache[keys[i]] = result
+        
+        return results
+    
+    async def _map_accounts_uncached(self, source_accounts: List[AccountData], targets: MappingTargets, context: str = None) -> List[Dict[str, Any]]:
+        """Resolve clear lexical matches locally and send the rest to Claude with a shortlist of targets"""
+        results = [None] * len(source_accounts)
+        pending = []
+        candidates = set()
+        
+        if targets.accounts:
+            scores, ranked = targets.rank(source_accounts)
+            for i, (row, top) in enumerate(zip(scores, ranked)):
+                index = targets.direct_match(source_accounts[i], row)
+                if index is not None:
+                    match = targets.accounts[index]
+                    results[i] = {
+                        'mapping': match.account_code,
+                        'confidence': int(row[index]),
+                        'reasoning': f"Lexical match on description: '{source_accounts[i].account_description}' -> '{match.account_description}'",
+                        'alternatives': [targets.accounts[j].account_code for j in top if j != index][:2],
+                        'raw_response': ''
+                    }
+                else:
+                    pending.append(i)
+                    candidates.update(top.tolist())
+        else:
+            pending = list(range(len(source_accounts)))
+        
+        if pending:
+            # Union of every pending account's candidates, kept in the caller's target order
+            shortlist = "\n".join([targets.lines[j] for j in sorted(candidates)])
+            mapped = await self._map_with_claude([source_accounts[i] for i in pending], shortlist, context)
+            for i, result in zip(pending, mapped):
+                results[i] = result
+        
+        return results
+    
+    async def _map_with_claude(self, source_accounts: List[AccountData], target_list: str, context: str = None) -> List[Dict[str, Any]]:
+        """Map several accounts with one Claude call; results are in source order"""
+        if len(source_accounts) == 1:
+            return [await self.map_account(source_accounts[0], target_list, context)]
+        
+        source_list = "\n".join([
+            f"{i}. {acc.account_code} - {acc.account_description} (Type: {acc.account_type or 'Unknown'}, Category: {acc.account_category or 'Unknown'})"
+            for i, acc in enumerate(source_accounts, 1)
+        ])
+        
+        prompt = f"""As an expert accountant, map each of these source accounts to the most appropriate target account.
+
+Source Accounts:
+{source_list}
+
+Available Target Accounts:
+{target_list}
+
+{f'Additional Context: {context}' if context else ''}
+
+Respond with ONLY a JSON array containing one object per source account, in this exact format:
+```json
+[{{"source_code": "...", "mapping": "target_account_code", "confidence": 0-100, "reasoning": "brief explanation", "alternatives": ["alternative account codes"]}}]
+```
+
+Consider account functionality, business purpose, and financial statement classification."""
+
+        try:
+            messages = [{"role": "user", "content": prompt}]
+            response_text = await self.chat_completion(messages, None)
+            parsed = self.parse_batch_response(response_text)
+        except Exception as e:
+            logger.error(f"Error calling Claude API: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"API call failed: {str(e)}")
+        
+        # Anything Claude skipped or garbled is retried on its own
+        missing = [acc for acc in source_accounts if acc.account_code not in parsed]
+        if missing:
+            logger.warning(f"Batched response missing {len(missing)}/{len(source_accounts)} accounts, mapping them individually")
+            retried = await asyncio.gather(*[self.map_account(acc, target_list, context) for acc in missing])
+            parsed.update(zip([acc.account_code for acc in missing], retried))
+        
+        return [parsed[acc.account_code] for acc in source_accounts]
+    
+    def parse_batch_response(self, response_text: str) -> Dict[str, Dict[str, Any]]:
+        """Parse a batched JSON mapping response into per-source results, keyed by source code"""
+        block = JSON_BLOCK_RE.search(response_text)
+        text = block.group(1) if block else response_text[response_text.find('['):response_text.rfind(']') + 1]
+        try:
+            items = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            logger.warning("Could not parse batched mapping response as JSON")
+            return {}
+        
+        results = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                # A bare string would otherwise be iterated character by character
+                alternatives = item.get('alternatives')
+                if not isinstance(alternatives, list):
+                    alternatives = []
+                results[str(item['source_code']).strip()] = {
+                    'mapping': str(item.get('mapping') or 'UNKNOWN').strip(),
+                    'confidence': int(item.get('confidence') or 0),
+                    'reasoning': str(item.get('reasoning') or 'No reasoning provided').strip(),
+                    'alternatives': [str(alt).strip() for alt in alternatives if str(alt).strip() and str(alt).strip().lower() != 'none'],
+                    'raw_response': response_text
+                }
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+        return results
+    
     def parse_claude_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Claude's structured response"""
-        import re
-        
-        mapping = re.search(r'MAPPING:\s*([^\n]+)', response_text, re.IGNORECASE)
-        confidence = re.search(r'CONFIDENCE:\s*(\d+)', response_text, re.IGNORECASE)
-        reasoning = re.search(r'REASONING:\s*([^\n]+(?:\n(?!ALTERNATIVES:)[^\n]+)*)', response_text, re.IGNORECASE)
-        alternatives = re.search(r'ALTERNATIVES:\s*([^\n]+)', response_text, re.IGNORECASE)
+        mapping = MAPPING_RE.search(response_text)
+        confidence = CONFIDENCE_RE.search(response_text)
+        reasoning = REASONING_RE.search(response_text)
+        alternatives = ALTERNATIVES_RE.search(response_text)
         
         return {
             'mapping': mapping.group(1).strip() if mapping else 'UNKNOWN',
@@ -237,16 +808,21 @@ Consider account functionality, business purpose, and financial statement classi
         }
     
     async def close(self):
-        if self.session:
-            await self.session.close()
+        await self.close_client()
     
-    async def analyze_uploaded_data(self, session_id: str, user_query: str) -> str:
+    async def analyze_uploaded_data(self, session_id: str, user_query: str, file_data: Optional[Dict[str, Any]] = None) -> str:
         """Analyze uploaded data and provide mapping suggestions directly in chat"""
-        if session_id not in uploaded_files_data:
+        if file_data is None:
+            file_data = await uploaded_files_data.get(session_id)
+        if file_data is None:
             return "No uploaded file data found for this session."
         
-        file_data = uploaded_files_data[session_id]
-        accounts_data = file_data['accounts']
+        try:
+            accounts_data = load_uploaded_accounts(file_data['path'])
+        except (FileNotFoundError, pa.ArrowInvalid):
+            # Swept after expiry, or written on another host's disk
+            logger.warning(f"Uploaded accounts file missing for session {session_id}: {file_data['path']}")
+            return "No uploaded file data found for this session."
         
         # Create a focused prompt for mapping analysis
         analysis_prompt = f"""MAPPING REQUEST: {user_query}
@@ -255,7 +831,7 @@ SOURCE FILE: {file_data['filename']} ({file_data['account_count']} accounts)
 COLUMNS: {', '.join(file_data['columns'])}
 
 FIS IO ACCOUNT DATA:
-{json.dumps(accounts_data, indent=2)}
+{dumps_prompt_json(accounts_data)}
 
 INSTRUCTIONS:
 - Provide ONLY structured mapping results in the required format
@@ -278,10 +854,6 @@ INSTRUCTIONS:
 # Global Claude client
 claude_client = ClaudeAPIClient()
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    await claude_client.close()
-
 @app.get("/")
 async def root():
     return {"message": "Account Mapping API", "version": "1.0.0", "status": "running"}
@@ -290,6 +862,19 @@ async def root():
 async def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+async def sse_events(chunks):
+    """Re-emit streamed text chunks to the browser as server-sent events"""
+    try:
+        async for text in chunks:
+            yield b"data: " + orjson.dumps({"text": text}) + b"\n\n"
+        yield b"event: done\ndata: {}\n\n"
+    except Exception as e:
+        logger.error(f"Chat stream error: {str(e)}")
+        yield b"event: error\ndata: " + orjson.dumps({"detail": f"Chat processing failed: {str(e)}"}) + b"\n\n"
+
+# Words that route a chat about an uploaded file to the file analysis prompt, matched in one pass
+FILE_ANALYSIS_RE = re.compile("|".join(["map", "mapping", "analyze", "analysis", "suggest", "recommend", "accounts", "data"]))
+
 @app.post("/chat")
 async def chat_with_claude(request: Dict[str, Any]):
     """Handle chat messages with Claude AI"""
@@ -299,6 +884,7 @@ async def chat_with_claude(request: Dict[str, Any]):
         conversation = request.get('conversation', [])
         session_id = request.get('session_id')  # Get session ID for uploaded file context
         is_mapping_request = request.get('is_mapping_request', False)  # Flag to differentiate chat vs mapping
+        stream = request.get('stream', False)  # Opt-in server-sent events for conversational replies
         
         if not message.strip():
             raise HTTPException(status_code=400, detail="Message cannot be empty")
@@ -308,117 +894,16 @@ async def chat_with_claude(request: Dict[str, Any]):
         logger.info(f"Message preview: {message[:100]}...")
         
         # Create different system prompts based on request type
-        if is_mapping_request:
-            # Use mapping-focused system prompt
-            system_prompt = """You are Claude, an AI assistant specialized in accounting cross-reference mapping between FIS IO ledger accounts and BNY Eagle accounting systems.
-
-CRITICAL INSTRUCTION: When providing mapping suggestions, respond ONLY with structured mapping data in the exact required format. Do not include conversational responses, analysis, or commentary.
-
-MAPPING CONTEXT:
-You are specifically helping map accounts FROM FIS IO ledger TO BNY Eagle chart of accounts.
-
-TARGET SYSTEM: BNY Eagle Account Structure
-- Account Code Format: 6-digit numeric (e.g., 101000, 102100)
-- Hierarchy: Account Class > Sub Class > Individual Accounts
-- Main Account Classes: Asset, Liability, Equity, Revenue, Expense
-
-CONFIDENCE SCORING:
-- 95-98%: Direct matches (exact functional equivalents)
-- 85-94%: Semantic matches (similar function, different naming)
-- 70-84%: Consolidated matches (multiple source accounts to one target)
-
-REQUIRED RESPONSE FORMAT for mapping requests:
-Provide mappings ONLY in this exact format:
-
-SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
-SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
-SOURCE_CODE -> TARGET_CODE (confidence%) # Source Description -> Target Description
-
-Example:
-1000 -> 101000 (95%) # Cash and Cash Equivalents -> Cash - Operating Account
-1010 -> 101100 (89%) # Checking Account -> Cash - Checking Account
-1020 -> 101200 (92%) # Savings Account -> Cash - Savings Account
-
-DO NOT include:
-- Conversational greetings or closings
-- Detailed explanations or analysis sections
-- Recommendations or suggestions
-- Additional commentary about the mapping process
-- Data quality assessments
-- Implementation approaches
-
-Focus solely on providing accurate, structured mapping data that can be directly parsed and imported into the mapping grid."""
-        else:
-            # Use conversational system prompt for regular chat
-            system_prompt = """You are Claude, a helpful AI assistant specializing in accounting and finance. You can help with:
-
-- General questions about accounting principles and practices
-- Explanations of financial concepts and terminology  
-- Guidance on account mapping and cross-referencing between systems
-- Analysis and discussion of financial data and structures
-- Support for accounting system migrations and implementations
+        system_prompt = MAPPING_SYSTEM_PROMPT if is_mapping_request else CHAT_SYSTEM_PROMPT
 
-You are knowledgeable about both FIS IO ledger systems and BNY Eagle accounting structures. When users ask general questions or need explanations, provide clear, conversational responses with helpful context and examples.
-
-Be conversational, informative, and supportive. Only provide structured mapping data when explicitly requested to perform account mappings."""
-
-        # Add Eagle target account reference
-        if eagle_account_reference:
-            system_prompt += f"""
-
-EAGLE TARGET ACCOUNT STRUCTURE:
-Total Available Accounts: {eagle_account_reference.get('total_accounts', 0)}
-
-Account Classes Available:
-"""
-            for class_name, class_data in eagle_account_reference.get('account_classes', {}).items():
-                system_prompt += f"\n{class_name} Accounts:"
-                for sub_class, accounts in class_data.get('sub_classes', {}).items():
-                    system_prompt += f"\n  - {sub_class}: {len(accounts)} accounts"
-                    # Show sample accounts for each sub-class
-                    for account in accounts[:2]:  # Show first 2 accounts as examples
-                        system_prompt += f"\n    • {account['account_code']}: {account['description']}"
-
-        # Add ground truth mapping patterns
-        if ground_truth_mappings:
-            system_prompt += f"""
-
-GROUND TRUTH MAPPING PATTERNS ({len(ground_truth_mappings)} verified patterns):
-These are authoritative, verified mappings that should guide your decisions.
-
-USAGE PRIORITY:
-1. EXACT MATCHES: If source account exactly matches ground truth, use that mapping (95-98% confidence)
-2. PATTERN MATCHES: If source account follows similar pattern, adapt the mapping (85-94% confidence)  
-3. ANALOGOUS MAPPINGS: Use as examples for similar account types (70-84% confidence)
-
-SAMPLE PATTERNS BY TYPE:"""
-            
-            # Group by mapping type
-            mapping_types = {}
-            for mapping in ground_truth_mappings:
-                mapping_type = mapping.get('Mapping_Type', 'Other')
-                if mapping_type not in mapping_types:
-                    mapping_types[mapping_type] = []
-                mapping_types[mapping_type].append(mapping)
-            
-            # Show examples from each type
-            for mapping_type, mappings in mapping_types.items():
-                system_prompt += f"""
-
-{mapping_type.upper()} MAPPINGS:"""
-                for mapping in mappings[:3]:  # Show top 3 per type
-                    system_prompt += f"""
-  {mapping['Source_Account_Code']} -> {mapping['Target_Account_Code']} ({mapping['Mapping_Confidence']}%)
-  Source: {mapping['Source_Description']}
-  Target: {mapping['Target_Description']}
-  Notes: {mapping['Notes']}"""
+        # Add Eagle target account structure and ground truth patterns
+        system_prompt += reference_prompt
 
         # Add uploaded file context if available
         logger.info(f"Chat request - session_id: {session_id}")
-        logger.info(f"Available session_ids in uploaded_files_data: {list(uploaded_files_data.keys())}")
         
-        if session_id and session_id in uploaded_files_data:
-            file_data = uploaded_files_data[session_id]
+        file_data = await uploaded_files_data.get(session_id) if session_id else None
+        if file_data is not None:
             logger.info(f"Found uploaded file data for session {session_id}: {file_data['filename']}")
             system_prompt += f"""
 
@@ -426,8 +911,8 @@ UPLOADED SOURCE FILE CONTEXT:
 - Filename: {file_data['filename']}
 - Total accounts: {file_data['account_count']}
 - Columns: {', '.join(file_data['columns'])}
-- Upload time: {file_data['upload_time']}
-- Sample data: {json.dumps(file_data['raw_data'], indent=2)}
+- Upload time: {datetime.fromtimestamp(file_data['upload_time_ns'] / 1e9)}
+- Sample data: {file_data['raw_data_json']}
 
 You have full access to both the uploaded FIS IO source accounts AND the complete Eagle target account structure. You can:
 1. Analyze source accounts and suggest specific Eagle target mappings
@@ -440,18 +925,22 @@ When providing mappings, always reference specific Eagle account codes from the
             logger.warning(f"No uploaded file data found for session_id: {session_id}")
 
         if context:
-            system_prompt += f"\n\nCurrent mapping context: {json.dumps(context, indent=2)}"
+            system_prompt += f"\n\nCurrent mapping context: {dumps_prompt_json(context)}"
         
         # Check if this is a file-analysis query
-        file_analysis_keywords = ["map", "mapping", "analyze", "analysis", "suggest", "recommend", "accounts", "data"]
-        is_file_query = session_id and any(keyword in message.lower() for keyword in file_analysis_keywords)
+        is_file_query = session_id and FILE_ANALYSIS_RE.search(message.lower()) is not None
         
-        if is_file_query and session_id in uploaded_files_data:
+        if is_file_query and file_data is not None:
             # Use specialized file analysis instead of generic chat
-            response = await claude_client.analyze_uploaded_data(session_id, message)
+            response = await claude_client.analyze_uploaded_data(session_id, message, file_data)
         else:
             # Prepare messages for Claude API
             messages = conversation + [{"role": "user", "content": message}]
+            if stream:
+                return StreamingResponse(
+                    sse_events(claude_client.chat_stream(messages, system_prompt)),
+                    media_type="text/event-stream"
+                )
             response = await claude_client.chat_completion(messages, system_prompt)
         
         return {"response": response, "status": "success"}
@@ -477,50 +966,95 @@ async def receive_feedback(request: Dict[str, Any]):
         logger.error(f"Feedback error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Feedback processing failed: {str(e)}")
 
+# AccountData field -> upload column, falling back to the Eagle-style column name
+UPLOAD_FIELD_COLUMNS = {
+    "account_code": ("Account_Code", "GL_Account"),
+    "account_description": ("Account_Description", "GL_Description"),
+    "account_type": ("Account_Type", "Account_Class"),
+    "account_category": ("Account_Category", "Sub_Class"),
+}
+# Every other column is carried through as string metadata
+UPLOAD_NON_METADATA_COLUMNS = {'Account_Code', 'GL_Account', 'Account_Description', 'GL_Description', 'Account_Type', 'Account_Class'}
+
+def accounts_from_frame(df: pd.DataFrame) -> List[AccountData]:
+    """Convert an uploaded DataFrame to AccountData column by column"""
+    fields = {}
+    for field, candidates in UPLOAD_FIELD_COLUMNS.items():
+        column = next((name for name in candidates if name in df.columns), None)
+        required = field in ("account_code", "account_description")
+        if column is None:
+            fields[field] = [''] * len(df) if required else [None] * len(df)
+        elif required:
+            fields[field] = df[column].astype(str).tolist()
+        else:
+            fields[field] = df[column].astype(str).where(df[column].notna(), None).tolist()
+
+    metadata_columns = [col for col in df.columns if col not in UPLOAD_NON_METADATA_COLUMNS]
+    if metadata_columns:
+        fields["metadata"] = df[metadata_columns].astype(str).to_dict('records')
+    else:
+        # An empty column selection yields no records, and zip() below would then drop every account
+        fields["metadata"] = [{} for _ in range(len(df))]
+
+    # Parsed from our own DataFrame, so validation is skipped
+    return [
+        AccountData.model_construct(**dict(zip(fields, values)))
+        for values in zip(*fields.values())
+    ]
+
+def parse_upload(content: bytes, filename: str) -> tuple:
+    """Parse an uploaded CSV/Excel file into (account dicts, columns, sample rows as prompt JSON)"""
+    if filename.endswith('.csv'):
+        # Arrow's multi-threaded reader parses the raw bytes without a decoded str copy;
+        # it yields None for missing strings, so normalize to NaN like the default parser
+        df = pd.read_csv(BytesIO(content), engine='pyarrow').fillna(np.nan)
+    elif filename.endswith(('.xlsx', '.xls')):
+        # Excel files are binary, use BytesIO instead of StringIO
+        df = pd.read_excel(BytesIO(content))
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV or Excel.")
+    
+    # Convert DataFrame to AccountData objects; dumped once for both storage and response
+    accounts = ACCOUNT_LIST_ADAPTER.dump_python(accounts_from_frame(df))
+    # The sample is only ever embedded in chat prompts, so encode it once here
+    return accounts, list(df.columns), dumps_prompt_json(df.head(10).to_dict('records'))
+
 @app.post("/upload-accounts")
-async def upload_accounts(file: UploadFile = File(...)):
-    """Upload and parse account data from CSV/Excel file"""
+async def upload_accounts(file: UploadFile = File(...), summary: bool = False):
+    """Upload and parse account data from CSV/Excel file
+
+    With ?summary=1 the parsed accounts are left out of the response, for
+    callers that only need the session id and count.
+    """
     try:
         content = await file.read()
         
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(StringIO(content.decode('utf-8')))
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            # Excel files are binary, use BytesIO instead of StringIO
-            df = pd.read_excel(BytesIO(content))
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV or Excel.")
-        
-        # Convert DataFrame to AccountData objects
-        accounts = []
-        for _, row in df.iterrows():
-            account = AccountData(
-                account_code=str(row.get('Account_Code', row.get('GL_Account', ''))),
-                account_description=str(row.get('Account_Description', row.get('GL_Description', ''))),
-                account_type=str(row.get('Account_Type', row.get('Account_Class', ''))) if pd.notna(row.get('Account_Type', row.get('Account_Class'))) else None,
-                account_category=str(row.get('Account_Category', row.get('Sub_Class', ''))) if pd.notna(row.get('Account_Category', row.get('Sub_Class'))) else None,
-                metadata={col: str(row[col]) for col in df.columns if col not in ['Account_Code', 'GL_Account', 'Account_Description', 'GL_Description', 'Account_Type', 'Account_Class']}
-            )
-            accounts.append(account)
+        # pandas parsing is CPU-bound; keep it off the event loop serving Claude responses
+        accounts, columns, raw_data_json = await asyncio.to_thread(parse_upload, content, file.filename)
         
         # Generate session ID and store file data
         session_id = str(uuid.uuid4())
-        uploaded_files_data[session_id] = {
+        path = await asyncio.to_thread(save_uploaded_accounts, session_id, accounts)
+        await uploaded_files_data.set(session_id, {
             "filename": file.filename,
-            "accounts": [acc.dict() for acc in accounts],
-            "upload_time": datetime.now(),
+            "path": path,
+            # Raw clock value; formatted only when a chat prompt shows it, and an int
+            # round-trips through the Redis store unchanged
+            "upload_time_ns": time.time_ns(),
             "account_count": len(accounts),
-            "columns": list(df.columns),
-            "raw_data": df.to_dict('records')[:10]  # Store first 10 rows as sample
-        }
+            "columns": columns,
+            "raw_data_json": raw_data_json  # First 10 rows as sample, pre-encoded for the chat prompt
+        })
         logger.info(f"File upload: Created session_id {session_id} for file {file.filename}")
         
-        return {
+        result = {
             "status": "success",
             "session_id": session_id,
-            "accounts_count": len(accounts),
-            "accounts": [acc.dict() for acc in accounts]
+            "accounts_count": len(accounts)
         }
+        if not summary:
+            result["accounts"] = accounts
+        return result
     
     except Exception as e:
         logger.error(f"Error processing file upload: {str(e)}")
@@ -534,49 +1068,63 @@ async def map_accounts(request: MappingRequest, background_tasks: BackgroundTask
     start_time = datetime.now()
     
     # Initialize session
-    mapping_sessions[session_id] = {
+    await mapping_sessions.set(session_id, {
         "status": "processing",
         "start_time": start_time,
         "total_accounts": len(request.source_accounts),
         "processed_accounts": 0,
         "results": []
-    }
+    })
     
     try:
-        results = []
-        
-        for i, source_account in enumerate(request.source_accounts):
-            logger.info(f"Processing account {i+1}/{len(request.source_accounts)}: {source_account.account_code}")
-            
-            account_start_time = datetime.now()
+        # Bounded by the API's rate limit; 529s are absorbed by the retry path in chat_completion
+        semaphore = asyncio.Semaphore(CLAUDE_CONCURRENCY)
+        total_accounts = len(request.source_accounts)
+        targets = MappingTargets(request.target_accounts)
+
+        async def map_batch(start: int, batch: List[AccountData]) -> List[MappingResult]:
+            async with semaphore:
+                logger.info(f"Processing accounts {start+1}-{start+len(batch)}/{total_accounts}")
+                
+                batch_start_time = datetime.now()
+                
+                # Call Claude API
+                claude_results = await claude_client.map_accounts_batch(
+                    batch, 
+                    targets, 
+                    request.mapping_context
+                )
             
-            # Call Claude API
-            claude_result = await claude_client.map_account(
-                source_account, 
-                request.target_accounts, 
-                request.mapping_context
-            )
+            # Batch time shared evenly across its accounts
+            processing_time = (datetime.now() - batch_start_time).total_seconds() / len(batch)
             
-            processing_time = (datetime.now() - account_start_time).total_seconds()
-            
-            result = MappingResult(
-                source_account_code=source_account.account_code,
-                target_account_code=claude_result['mapping'],
-                confidence_score=claude_result['confidence'],
-                reasoning=claude_result['reasoning'],
-                alternatives=claude_result['alternatives'],
-                processing_time=processing_time
-            )
+            batch_results = [
+                MappingResult(
+                    source_account_code=source_account.account_code,
+                    target_account_code=claude_result['mapping'],
+                    confidence_score=claude_result['confidence'],
+                    reasoning=claude_result['reasoning'],
+                    alternatives=claude_result['alternatives'],
+                    processing_time=processing_time
+                )
+                for source_account, claude_result in zip(batch, claude_results)
+            ]
             
-            results.append(result)
+            # Update session as each batch completes
+            await mapping_sessions.increment(session_id, "processed_accounts", len(batch))
+            await mapping_sessions.append(session_id, "results", *(result.dict() for result in batch_results))
             
-            # Update session
-            mapping_sessions[session_id]["processed_accounts"] = i + 1
-            mapping_sessions[session_id]["results"].append(result.dict())
-            
-            # Add delay to avoid rate limiting (increased delay)
-            if i < len(request.source_accounts) - 1:
-                await asyncio.sleep(3)  # Increased from 1 to 3 seconds
+            return batch_results
+
+        source_iter = iter(request.source_accounts)
+        batches = iter(lambda: list(islice(source_iter, CLAUDE_BATCH_SIZE)), [])
+        
+        # Results come back in source account order
+        batch_results = await asyncio.gather(*[
+            map_batch(i * CLAUDE_BATCH_SIZE, batch)
+            for i, batch in enumerate(batches)
+        ])
+        results = [result for batch in batch_results for result in batch]
         
         # Calculate summary statistics
         total_time = (datetime.now() - start_time).total_seconds()
@@ -592,8 +1140,7 @@ async def map_accounts(request: MappingRequest, background_tasks: BackgroundTask
         }
         
         # Update session status
-        mapping_sessions[session_id]["status"] = "completed"
-        mapping_sessions[session_id]["summary"] = summary
+        await mapping_sessions.update(session_id, status="completed", summary=summary)
         
         response = MappingResponse(
             session_id=session_id,
@@ -605,18 +1152,18 @@ async def map_accounts(request: MappingRequest, background_tasks: BackgroundTask
         return response
     
     except Exception as e:
-        mapping_sessions[session_id]["status"] = "failed"
-        mapping_sessions[session_id]["error"] = str(e)
+        await mapping_sessions.update(session_id, status="failed", error=str(e))
         logger.error(f"Error in mapping process: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Mapping process failed: {str(e)}")
 
 @app.get("/mapping-status/{session_id}")
 async def get_mapping_status(session_id: str):
     """Get the status of a mapping session"""
-    if session_id not in mapping_sessions:
+    session = await mapping_sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return mapping_sessions[session_id]
+    return session
 
 @app.post("/run-evaluation")
 async def run_evaluation(request: EvaluationRequest):
@@ -640,8 +1187,8 @@ async def run_evaluation(request: EvaluationRequest):
         # For this example, we'll use a simplified target list
         # In practice, you'd load the full target accounts
         target_accounts = [
-            AccountData(account_code="101000", account_description="Cash - Operating Account", account_type="Asset"),
-            AccountData(account_code="103000", account_description="Accounts Receivable - Trade", account_type="Asset"),
+            TargetAccountData(account_code="101000", account_description="Cash - Operating Account", account_type="Asset"),
+            TargetAccountData(account_code="103000", account_description="Accounts Receivable - Trade", account_type="Asset"),
             # Add more target accounts as needed
         ]
         
@@ -655,18 +1202,19 @@ async def run_evaluation(request: EvaluationRequest):
         # This would normally call the mapping function
         # For now, return a placeholder response
         
-        evaluation_results[eval_id] = {
+        summary = {
             "status": "completed",
             "accuracy": 0.85,
             "avg_confidence": 82,
             "test_cases": len(request.test_cases),
             "processing_time": (datetime.now() - start_time).total_seconds()
         }
+        await evaluation_results.set(eval_id, summary)
         
         return {
             "evaluation_id": eval_id,
             "status": "completed",
-            "summary": evaluation_results[eval_id]
+            "summary": summary
         }
     
     except Exception as e:
@@ -700,23 +1248,16 @@ async def search_ground_truth_mappings(request: Dict[str, Any]):
         if not search_term:
             return {"mappings": [], "total": 0, "message": "Search term is required"}
         
-        filtered_mappings = []
-        
-        for mapping in ground_truth_mappings:
+        mapping_type_term = mapping_type.lower()
+        filtered_mappings = [
+            row.mapping for row in ground_truth_search_rows
             # Search in source code or description
-            source_match = (
-                search_term in mapping.get('Source_Account_Code', '').lower() or
-                search_term in mapping.get('Source_Description', '').lower()
-            )
-            
+            if (search_term in row.source_code or search_term in row.source_description)
             # Filter by mapping type if specified
-            type_match = not mapping_type or mapping.get('Mapping_Type', '').lower() == mapping_type.lower()
-            
+            and (not mapping_type_term or row.mapping_type == mapping_type_term)
             # Filter by confidence
-            confidence_match = mapping.get('Mapping_Confidence', 0) >= min_confidence
-            
-            if source_match and type_match and confidence_match:
-                filtered_mappings.append(mapping)
+            and row.confidence >= min_confidence
+        ]
         
         return {
             "mappings": filtered_mappings,
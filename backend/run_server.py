@@ -12,10 +12,18 @@ if api_key:
 else:
     print("❌ CLAUDE_API_KEY not found")
 
+# Sessions are only shared between worker processes through Redis
+if os.getenv('REDIS_URL'):
+    workers = int(os.getenv('UVICORN_WORKERS', os.cpu_count() or 1))
+else:
+    workers = 1
+    if int(os.getenv('UVICORN_WORKERS', 1)) > 1:
+        print("⚠️  UVICORN_WORKERS ignored: multiple workers need REDIS_URL for shared sessions")
+
 # Now try to start the server
 if __name__ == "__main__":
-    print("Starting FastAPI server...")
+    print(f"Starting FastAPI server with {workers} worker(s)...")
     import uvicorn
-    from main import app
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=False)
\ No newline at end of file
+    # Workers need an import string; uvloop and httptools ship with uvicorn[standard]
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False, workers=workers, loop="uvloop", http="httptools", log_level="info")
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the backend test scripts
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BACKEND_URL = "http://localhost:8000"
+TEST_FILE_NAME = "fis-io-ledger-accounts.csv"
+TEST_FILE_PATH = f"test-data/{TEST_FILE_NAME}"
+
+# (connect, read) bounds so a stalled backend can't hang the run; chat reads
+# match the backend's own 60s budget for a Claude call
+UPLOAD_TIMEOUT = (5, 30)
+CHAT_TIMEOUT = (5, 60)
+
+# Transient gateway errors are retried with a short backoff rather than
+# surfacing as a failed step
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=("GET", "POST"),
+    raise_on_status=False
+)
+
+# Print every logged line immediately instead of once per StepLog block
+UNBUFFERED_LOG = os.getenv("TEST_LOG_UNBUFFERED", "").lower() in ("1", "true", "yes")
+
+# One pooled session so the upload -> chat steps reuse keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=RETRY))
+
+class StepLog:
+    """Collects a burst of report lines and writes them to stdout in one go"""
+
+    def __init__(self):
+        self.lines = []
+
+    def line(self, text=""):
+        if UNBUFFERED_LOG:
+            print(text, flush=True)
+        else:
+            self.lines.append(text)
+
+    def flush(self):
+        if self.lines:
+            sys.stdout.write("\n".join(self.lines) + "\n")
+            sys.stdout.flush()
+            self.lines.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+def preview(text, limit=300):
+    """Truncate text for console output, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
+
+@lru_cache(maxsize=4)
+def csv_bytes(path=TEST_FILE_PATH):
+    """Read a test CSV once per process (the sample FIS IO ledger by default)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def upload_sample_ledger():
+    """Upload the sample ledger and return (session_id, accounts_count)
+
+    Uses ?summary=1 so the backend skips echoing every parsed account; callers
+    that need the accounts themselves should post to /upload-accounts directly.
+    """
+    with open(TEST_FILE_PATH, 'rb') as f:
+        response = SESSION.post(
+            f"{BACKEND_URL}/upload-accounts",
+            params={"summary": 1},
+            files={'file': f},
+            timeout=UPLOAD_TIMEOUT
+        )
+    response.raise_for_status()
+    result = orjson.loads(response.content)
+    return result['session_id'], result['accounts_count']
+
+def post_json(path, payload, **kwargs):
+    """POST a JSON body serialized with orjson"""
+    return SESSION.post(
+        f"{BACKEND_URL}{path}",
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        **kwargs
+    )
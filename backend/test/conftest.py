@@ -0,0 +1,99 @@
+"""
+Shared pytest fixtures for the backend test scripts
+
+By default the backend is replaced with canned responses so the suite runs
+offline in milliseconds. Pass --remote to hit a running server (and Claude).
+"""
+
+import time
+
+import pytest
+import requests
+import responses
+
+from backend_client import BACKEND_URL, SESSION, upload_sample_ledger
+
+# Standalone scripts that are run directly rather than collected
+collect_ignore = ["debug_session_ids.py", "test_file_attachment.py", "test_ui_timing_issue.py"]
+
+MOCK_SESSION_ID = "00000000-0000-0000-0000-000000000000"
+
+MOCK_ACCOUNTS = [
+    {
+        "account_code": "1000",
+        "account_description": "Cash and Cash Equivalents",
+        "account_type": "Asset",
+        "account_category": "Current Assets",
+        "metadata": {}
+    },
+    {
+        "account_code": "1010",
+        "account_description": "Operating Cash Account",
+        "account_type": "Asset",
+        "account_category": "Current Assets",
+        "metadata": {}
+    }
+]
+
+CANNED_MAPPING_TEXT = """Here are the mapping suggestions for the uploaded FIS IO accounts:
+
+1. 1000 -> CASH_001 (95%)
+   Reasoning: Primary cash account mapping, high confidence on account type and description
+
+2. 1010 -> BANK_CHK (90%)
+   Reasoning: Operating checking account
+
+3. 1020 -> CASH_PAY (85%)
+   Reasoning: Payroll cash account mapping
+
+Overall confidence in these account mappings is high."""
+
+def pytest_addoption(parser):
+    parser.addoption("--remote", action="store_true", default=False,
+                     help=f"run against the live backend at {BACKEND_URL}")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "remote: needs the live backend and Claude API (run with --remote)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--remote"):
+        return
+    skip_remote = pytest.mark.skip(reason="needs --remote")
+    for item in items:
+        if "remote" in item.keywords:
+            item.add_marker(skip_remote)
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    """Keep waits in the scripts from adding wall time to the run"""
+    monkeypatch.setattr(time, "sleep", lambda *_: None)
+
+@pytest.fixture(scope="session")
+def backend(request):
+    """Serve canned backend responses, or check the live server with --remote"""
+    if request.config.getoption("--remote"):
+        try:
+            SESSION.get(f"{BACKEND_URL}/health", timeout=5)
+        except requests.exceptions.ConnectionError:
+            pytest.skip(f"Backend server is not running at {BACKEND_URL}")
+        yield None
+        return
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as mock:
+        mock.add(responses.GET, f"{BACKEND_URL}/health", json={"status": "healthy"})
+        mock.add(responses.POST, f"{BACKEND_URL}/upload-accounts", json={
+            "status": "success",
+            "session_id": MOCK_SESSION_ID,
+            "accounts_count": 72,
+            "accounts": MOCK_ACCOUNTS
+        })
+        mock.add(responses.POST, f"{BACKEND_URL}/chat", json={
+            "response": CANNED_MAPPING_TEXT,
+            "status": "success"
+        })
+        yield mock
+
+@pytest.fixture(scope="session")
+def uploaded_session(backend):
+    """Upload the sample ledger once and share its session across tests"""
+    return upload_sample_ledger()
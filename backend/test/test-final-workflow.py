@@ -3,28 +3,21 @@
 Final comprehensive test for mapping response display in right panel
 """
 
-import requests
-import json
+import re
+import orjson
 
-BACKEND_URL = "http://localhost:8000"
+from backend_client import CHAT_TIMEOUT, StepLog, post_json, upload_sample_ledger
 
-def test_complete_workflow():
+# Same pattern the frontend uses to pull mappings out of Claude's reply
+MAPPING_RE = re.compile(r'(?m)^\d+\.\s*(.+?)\s*->\s*(.+?)\s*\((\d+)%?\)')
+
+def test_complete_workflow(uploaded_session):
     print("🏁 Final Test: Complete Mapping Response Workflow")
     print("=" * 60)
     
     # Step 1: Upload accounts
-    print("📤 Step 1: Uploading accounts...")
-    with open('test-data/fis-io-ledger-accounts.csv', 'rb') as f:
-        files = {'file': f}
-        response = requests.post(f"{BACKEND_URL}/upload-accounts", files=files)
-    
-    if response.status_code != 200:
-        print(f"❌ Upload failed: {response.status_code}")
-        return False
-    
-    result = response.json()
-    session_id = result['session_id']
-    print(f"✅ Uploaded {result.get('accounts_count', 0)} accounts")
+    session_id, accounts_count = uploaded_session
+    print(f"✅ Uploaded {accounts_count} accounts")
     print(f"   Session ID: {session_id}")
     
     # Step 2: Request structured mappings
@@ -53,87 +46,78 @@ Please provide mappings for the uploaded accounts now.
         "session_id": session_id
     }
     
-    response = requests.post(f"{BACKEND_URL}/chat", json=chat_data, timeout=120)
+    response = post_json("/chat", chat_data, timeout=CHAT_TIMEOUT)
     
-    if response.status_code != 200:
-        print(f"❌ Chat request failed: {response.status_code}")
-        return False
+    assert response.status_code == 200, f"Chat request failed: {response.status_code}"
     
-    result = response.json()
+    result = orjson.loads(response.content)
     claude_response = result.get('response', '')
     
-    print("✅ Claude response received!")
-    print(f"📝 Response length: {len(claude_response)} characters")
-    
-    # Step 3: Analyze response structure
-    print("\n🔍 Step 3: Analyzing response structure...")
-    
-    lines = claude_response.split('\n')
-    mappings_found = []
-    
-    for line in lines:
-        if '->' in line and '(' in line and '%' in line:
-            mappings_found.append(line.strip())
-    
-    print(f"📊 Found {len(mappings_found)} structured mappings:")
-    for i, mapping in enumerate(mappings_found[:5], 1):
-        print(f"   {i}. {mapping}")
-    
-    if len(mappings_found) > 5:
-        print(f"   ... and {len(mappings_found) - 5} more")
-    
-    # Step 4: Test parsing logic
-    print("\n🛠️  Step 4: Testing frontend parsing logic...")
-    
-    parsed_mappings = []
-    
-    for line in lines:
-        # Same regex as frontend
-        import re
-        mapping_match = re.match(r'^\d+\.\s*(.+?)\s*->\s*(.+?)\s*\((\d+)%?\)', line)
-        if mapping_match:
-            source, target, confidence = mapping_match.groups()
-            parsed_mappings.append({
-                'source': source.strip(),
-                'target': target.strip(),
-                'confidence': int(confidence)
-            })
-    
-    print(f"✅ Successfully parsed {len(parsed_mappings)} mappings for frontend:")
-    for mapping in parsed_mappings[:3]:
-        print(f"   • {mapping['source']} → {mapping['target']} ({mapping['confidence']}%)")
-    
-    # Step 5: Provide final assessment
-    print("\n🎯 Final Assessment:")
-    print("-" * 60)
-    
-    success_criteria = {
-        "File Upload": response.status_code == 200,
-        "Claude Response": len(claude_response) > 100,
-        "Structured Format": len(mappings_found) > 0,
-        "Parseable Data": len(parsed_mappings) > 0,
-        "High Confidence": any(m['confidence'] > 80 for m in parsed_mappings)
-    }
+    with StepLog() as log:
+        log.line("✅ Claude response received!")
+        log.line(f"📝 Response length: {len(claude_response)} characters")
     
-    for criterion, passed in success_criteria.items():
-        status = "✅" if passed else "❌"
-        print(f"   {status} {criterion}: {'PASS' if passed else 'FAIL'}")
+        # Step 3: Analyze response structure
+        log.line("\n🔍 Step 3: Analyzing response structure...")
     
-    overall_success = all(success_criteria.values())
+        mapping_matches = list(MAPPING_RE.finditer(claude_response))
+        mappings_found = [m.group(0).strip() for m in mapping_matches]
     
-    print(f"\n{'🎉' if overall_success else '⚠️'} Overall Result:")
-    if overall_success:
-        print("   ✅ Complete workflow is ready for production!")
-        print("   ✅ Mapping responses will populate the right panel automatically")
-        print("   ✅ Users can review and modify Claude's suggestions in the grid")
-    else:
-        print("   ⚠️  Some issues need to be addressed before production")
-        print("   ℹ️  Check the failed criteria above")
+        log.line(f"📊 Found {len(mappings_found)} structured mappings:")
+        for i, mapping in enumerate(mappings_found[:5], 1):
+            log.line(f"   {i}. {mapping}")
+    
+        if len(mappings_found) > 5:
+            log.line(f"   ... and {len(mappings_found) - 5} more")
+    
+        # Step 4: Test parsing logic
+        log.line("\n🛠️  Step 4: Testing frontend parsing logic...")
+    
+        parsed_mappings = [
+            {'source': source.strip(), 'target': target.strip(), 'confidence': int(confidence)}
+            for source, target, confidence in (m.groups() for m in mapping_matches)
+        ]
+    
+        log.line(f"✅ Successfully parsed {len(parsed_mappings)} mappings for frontend:")
+        for mapping in parsed_mappings[:3]:
+            log.line(f"   • {mapping['source']} → {mapping['target']} ({mapping['confidence']}%)")
+    
+        # Step 5: Provide final assessment
+        log.line("\n🎯 Final Assessment:")
+        log.line("-" * 60)
+    
+        success_criteria = {
+            "File Upload": response.status_code == 200,
+            "Claude Response": len(claude_response) > 100,
+            "Structured Format": len(mappings_found) > 0,
+            "Parseable Data": len(parsed_mappings) > 0,
+            "High Confidence": any(m['confidence'] > 80 for m in parsed_mappings)
+        }
+    
+        for criterion, passed in success_criteria.items():
+            status = "✅" if passed else "❌"
+            log.line(f"   {status} {criterion}: {'PASS' if passed else 'FAIL'}")
+    
+        overall_success = all(success_criteria.values())
+    
+        log.line(f"\n{'🎉' if overall_success else '⚠️'} Overall Result:")
+        if overall_success:
+            log.line("   ✅ Complete workflow is ready for production!")
+            log.line("   ✅ Mapping responses will populate the right panel automatically")
+            log.line("   ✅ Users can review and modify Claude's suggestions in the grid")
+        else:
+            log.line("   ⚠️  Some issues need to be addressed before production")
+            log.line("   ℹ️  Check the failed criteria above")
     
-    return overall_success
+    assert overall_success, "Some workflow criteria failed"
 
 if __name__ == "__main__":
-    success = test_complete_workflow()
+    try:
+        test_complete_workflow(upload_sample_ledger())
+        success = True
+    except AssertionError as e:
+        print(f"❌ {e}")
+        success = False
     
     print("\n" + "=" * 60)
     if success:
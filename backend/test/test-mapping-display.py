@@ -3,33 +3,25 @@
 Test script to verify mapping response display in the right panel
 """
 
-import requests
+import re
 import time
-import json
+import orjson
 
-BACKEND_URL = "http://localhost:8000"
+from backend_client import CHAT_TIMEOUT, StepLog, post_json, preview, upload_sample_ledger
 
-def test_mapping_response_display():
+# "1. SOURCE_CODE -> TARGET_CODE (confidence%)", or any "ACCOUNT -> TARGET" line with a number
+MAPPING_LINE_RE = re.compile(r'(?m)^(?=.*->)(?:(?=.*\()(?=.*\))|(?=.*\d)).*$')
+CONFIDENCE_LINE_RE = re.compile(r'(?im)^(?=.*%)(?=.*(?:confidence|certain|score)).*$')
+
+def test_mapping_response_display(uploaded_session):
     print("🧪 Testing Mapping Response Display in Right Panel")
     print("=" * 60)
     
     # Step 1: Upload a file to get session_id
-    print("📤 Step 1: Uploading test file for mapping...")
-    
-    with open('test-data/fis-io-ledger-accounts.csv', 'rb') as f:
-        files = {'file': f}
-        response = requests.post(f"{BACKEND_URL}/upload-accounts", files=files)
-    
-    if response.status_code != 200:
-        print(f"❌ File upload failed: {response.status_code}")
-        return False
-    
-    result = response.json()
-    session_id = result['session_id']
-    accounts = result.get('accounts', [])
+    session_id, accounts_count = uploaded_session
     
     print(f"✅ File uploaded! Session ID: {session_id}")
-    print(f"📊 Accounts uploaded: {len(accounts)}")
+    print(f"📊 Accounts uploaded: {accounts_count}")
     
     # Step 2: Send a mapping request with structured format
     print("\n💬 Step 2: Sending structured mapping request...")
@@ -60,83 +52,75 @@ Please provide structured mapping suggestions for the uploaded accounts.
         "session_id": session_id
     }
     
-    chat_response = requests.post(f"{BACKEND_URL}/chat", json=chat_data, timeout=120)
+    chat_response = post_json("/chat", chat_data, timeout=CHAT_TIMEOUT)
     
-    if chat_response.status_code != 200:
-        print(f"❌ Mapping request failed: {chat_response.status_code}")
-        return False
+    assert chat_response.status_code == 200, f"Mapping request failed: {chat_response.status_code}"
     
-    chat_result = chat_response.json()
+    chat_result = orjson.loads(chat_response.content)
     response_text = chat_result.get('response', '')
     
-    print("✅ Mapping response received!")
-    print("📋 Claude's mapping response:")
-    print("-" * 60)
-    print(response_text[:800] + "..." if len(response_text) > 800 else response_text)
-    print("-" * 60)
-    
-    # Step 3: Check if response contains structured mapping data
-    print("\n🔍 Step 3: Analyzing response for structured mapping data...")
-    
-    # Look for mapping patterns
-    lines = response_text.split('\n')
-    found_mappings = []
-    
-    for line in lines:
-        # Pattern: "1. SOURCE_CODE -> TARGET_CODE (confidence%)"
-        if '->' in line and '(' in line and ')' in line:
-            found_mappings.append(line.strip())
-        # Alternative pattern: "ACCOUNT -> TARGET"
-        elif any(char.isdigit() for char in line) and '->' in line:
-            found_mappings.append(line.strip())
-    
-    if found_mappings:
-        print(f"✅ Found {len(found_mappings)} structured mapping suggestions:")
-        for i, mapping in enumerate(found_mappings[:5], 1):
-            print(f"   {i}. {mapping}")
-    else:
-        print("⚠️  No structured mapping patterns found in response")
-        print("   This means the frontend might not be able to extract mappings automatically")
-        print("   But the response still contains valuable mapping analysis for manual review")
-    
-    # Step 4: Check for confidence scores
-    print("\n📊 Step 4: Checking for confidence scores...")
-    
-    confidence_patterns = []
-    for line in lines:
-        if '%' in line and any(word in line.lower() for word in ['confidence', 'certain', 'score']):
-            confidence_patterns.append(line.strip())
-    
-    if confidence_patterns:
-        print(f"✅ Found confidence indicators:")
-        for pattern in confidence_patterns[:3]:
-            print(f"   • {pattern}")
-    else:
-        print("⚠️  No explicit confidence scores found")
-    
-    # Step 5: Provide recommendations
-    print("\n💡 Recommendations for Frontend Integration:")
-    print("-" * 60)
-    
-    if found_mappings:
-        print("✅ Response contains structured data suitable for automatic extraction")
-        print("   • Frontend can parse mapping suggestions and populate the grid")
-        print("   • Users will see both chat analysis AND structured mappings in right panel")
-    else:
-        print("⚠️  Response is primarily narrative - may need improved parsing")
-        print("   • Consider enhancing Claude prompt for more structured output")
-        print("   • Current setup will show analysis in chat, but no auto-populated mappings")
-    
-    print("\n🎯 Current Status:")
-    print("   • Chat integration: ✅ Working")
-    print("   • File context: ✅ Available to Claude") 
-    print("   • Response quality: ✅ Detailed analysis provided")
-    print(f"   • Structured mappings: {'✅ Found' if found_mappings else '⚠️ Limited'}")
-    
-    return len(found_mappings) > 0
+    with StepLog() as log:
+        log.line("✅ Mapping response received!")
+        log.line("📋 Claude's mapping response:")
+        log.line("-" * 60)
+        log.line(preview(response_text, 800))
+        log.line("-" * 60)
+    
+        # Step 3: Check if response contains structured mapping data
+        log.line("\n🔍 Step 3: Analyzing response for structured mapping data...")
+    
+        # Look for mapping patterns
+        found_mappings = [m.group(0).strip() for m in MAPPING_LINE_RE.finditer(response_text)]
+    
+        if found_mappings:
+            log.line(f"✅ Found {len(found_mappings)} structured mapping suggestions:")
+            for i, mapping in enumerate(found_mappings[:5], 1):
+                log.line(f"   {i}. {mapping}")
+        else:
+            log.line("⚠️  No structured mapping patterns found in response")
+            log.line("   This means the frontend might not be able to extract mappings automatically")
+            log.line("   But the response still contains valuable mapping analysis for manual review")
+    
+        # Step 4: Check for confidence scores
+        log.line("\n📊 Step 4: Checking for confidence scores...")
+    
+        confidence_patterns = [m.group(0).strip() for m in CONFIDENCE_LINE_RE.finditer(response_text)]
+    
+        if confidence_patterns:
+            log.line(f"✅ Found confidence indicators:")
+            for pattern in confidence_patterns[:3]:
+                log.line(f"   • {pattern}")
+        else:
+            log.line("⚠️  No explicit confidence scores found")
+    
+        # Step 5: Provide recommendations
+        log.line("\n💡 Recommendations for Frontend Integration:")
+        log.line("-" * 60)
+    
+        if found_mappings:
+            log.line("✅ Response contains structured data suitable for automatic extraction")
+            log.line("   • Frontend can parse mapping suggestions and populate the grid")
+            log.line("   • Users will see both chat analysis AND structured mappings in right panel")
+        else:
+            log.line("⚠️  Response is primarily narrative - may need improved parsing")
+            log.line("   • Consider enhancing Claude prompt for more structured output")
+            log.line("   • Current setup will show analysis in chat, but no auto-populated mappings")
+    
+        log.line("\n🎯 Current Status:")
+        log.line("   • Chat integration: ✅ Working")
+        log.line("   • File context: ✅ Available to Claude") 
+        log.line("   • Response quality: ✅ Detailed analysis provided")
+        log.line(f"   • Structured mappings: {'✅ Found' if found_mappings else '⚠️ Limited'}")
+    
+    assert found_mappings, "No structured mapping patterns found in response"
 
 if __name__ == "__main__":
-    success = test_mapping_response_display()
+    try:
+        test_mapping_response_display(upload_sample_ledger())
+        success = True
+    except AssertionError as e:
+        print(f"❌ {e}")
+        success = False
     if success:
         print("\n🎉 Test passed! Mapping responses contain structured data for right panel display.")
     else:
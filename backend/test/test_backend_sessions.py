@@ -3,99 +3,95 @@
 Test backend session ID handling
 """
 
-import requests
-import json
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def test_backend_session_handling():
+import orjson
+import pytest
+
+from backend_client import CHAT_TIMEOUT, post_json, preview, upload_sample_ledger
+
+# Phrases Claude uses when the uploaded file never reached it, matched in one pass
+ASKS_FOR_FILE_RE = re.compile("|".join(map(re.escape, ("don't see", "haven't provided", "please provide", "share the"))))
+
+# Words that show Claude answered with mappings
+MAPPING_KEYWORDS = ("confidence", "mapping", "account")
+
+# Shared by every scenario; each one only varies where the session id goes
+BASE_PAYLOAD = {
+    "message": "Please analyze the uploaded accounts and suggest Eagle mappings",
+    "context": {"totalRows": 72},
+    "conversation": []
+}
+
+# Exercises how the live backend resolves session ids, which canned responses can't show
+@pytest.mark.remote
+def test_backend_session_handling(uploaded_session):
     print("🧪 Testing Backend Session ID Handling")
     
     # Step 1: Upload file
-    print("\n📎 Step 1: Upload file...")
-    try:
-        with open("test-data/fis-io-ledger-accounts.csv", 'rb') as f:
-            file_content = f.read()
-        
-        files = {'file': ('fis-io-ledger-accounts.csv', file_content, 'text/csv')}
-        upload_response = requests.post("http://localhost:8000/upload-accounts", files=files)
-        
-        if upload_response.status_code == 200:
-            upload_result = upload_response.json()
-            session_id = upload_result['session_id']
-            print(f"✅ Upload successful")
-            print(f"📋 Session ID: {session_id}")
-            print(f"📊 Accounts: {upload_result['accounts_count']}")
-        else:
-            print(f"❌ Upload failed: {upload_response.text}")
-            return
-    except Exception as e:
-        print(f"❌ Upload error: {e}")
-        return
+    session_id, accounts_count = uploaded_session
+    print(f"✅ Upload successful")
+    print(f"📋 Session ID: {session_id}")
+    print(f"📊 Accounts: {accounts_count}")
+    assert str(uuid.UUID(session_id)) == session_id, f"Upload returned a malformed session id: {session_id}"
+    assert accounts_count == 72
     
     # Step 2: Test chat with the session ID
     print(f"\n💬 Step 2: Test chat with session ID...")
     
-    # Test different ways of sending session ID
+    # Test different ways of sending session ID; the backend only resolves the
+    # root session_id, so only those scenarios must reach the uploaded file
+    context_with_session = {**BASE_PAYLOAD["context"], "sessionId": session_id}
     test_payloads = [
         {
             "name": "session_id in root + context",
-            "payload": {
-                "message": "Please analyze the uploaded accounts and suggest Eagle mappings",
-                "context": {
-                    "totalRows": 72,
-                    "sessionId": session_id
-                },
-                "conversation": [],
-                "session_id": session_id
-            }
+            "payload": {**BASE_PAYLOAD, "context": context_with_session, "session_id": session_id},
+            "resolves_file": True
         },
         {
-            "name": "session_id only in context", 
-            "payload": {
-                "message": "Please analyze the uploaded accounts and suggest Eagle mappings",
-                "context": {
-                    "totalRows": 72,
-                    "sessionId": session_id
-                },
-                "conversation": []
-            }
+            "name": "session_id only in context",
+            "payload": {**BASE_PAYLOAD, "context": context_with_session},
+            "resolves_file": False
         },
         {
             "name": "session_id only in root",
-            "payload": {
-                "message": "Please analyze the uploaded accounts and suggest Eagle mappings", 
-                "context": {
-                    "totalRows": 72
-                },
-                "conversation": [],
-                "session_id": session_id
-            }
+            "payload": {**BASE_PAYLOAD, "session_id": session_id},
+            "resolves_file": True
         }
     ]
     
-    for test in test_payloads:
-        print(f"\n🧪 Testing: {test['name']}")
-        
-        try:
-            chat_response = requests.post("http://localhost:8000/chat", json=test['payload'])
+    # The scenarios are independent, so wait on Claude for all of them at once
+    with ThreadPoolExecutor(max_workers=len(test_payloads)) as executor:
+        futures = {
+            executor.submit(post_json, "/chat", test['payload'], timeout=CHAT_TIMEOUT): test
+            for test in test_payloads
+        }
+        for future in as_completed(futures):
+            test = futures[future]
+            print(f"\n🧪 Testing: {test['name']}")
+            
+            # Request errors propagate and fail the test
+            chat_response = future.result()
+            assert chat_response.status_code == 200, f"{test['name']}: {chat_response.status_code} - {chat_response.text}"
             
-            if chat_response.status_code == 200:
-                response_text = chat_response.json()['response']
-                print(f"✅ Request successful")
-                
-                # Check if Claude got the file data
-                if any(phrase in response_text.lower() for phrase in ["don't see", "haven't provided", "please provide", "share the"]):
-                    print(f"❌ Claude asking for file data (backend not sending file content)")
-                elif any(phrase in response_text.lower() for phrase in ["confidence", "mapping", "account"]):
-                    print(f"🎯 SUCCESS: Claude received file data and provided mappings!")
-                else:
-                    print(f"❓ Unclear response")
-                
-                print(f"📝 Response preview: {response_text[:150]}...")
+            response_text = orjson.loads(chat_response.content)['response']
+            response_lower = response_text.lower()
+            print(f"✅ Request successful")
+            print(f"📝 Response preview: {preview(response_text, 150)}")
+            
+            # Check if Claude got the file data
+            asks_for_file = ASKS_FOR_FILE_RE.search(response_lower) is not None
+            if asks_for_file:
+                print(f"❌ Claude asking for file data (backend not sending file content)")
+            elif any(phrase in response_lower for phrase in MAPPING_KEYWORDS):
+                print(f"🎯 SUCCESS: Claude received file data and provided mappings!")
             else:
-                print(f"❌ Request failed: {chat_response.status_code} - {chat_response.text}")
-                
-        except Exception as e:
-            print(f"❌ Request error: {e}")
+                print(f"❓ Unclear response")
+            
+            if test['resolves_file']:
+                assert not asks_for_file, f"{test['name']}: session {session_id} did not reach Claude"
 
 if __name__ == "__main__":
-    test_backend_session_handling()
\ No newline at end of file
+    test_backend_session_handling(upload_sample_ledger())
\ No newline at end of file
@@ -6,6 +6,8 @@ Tests the complete flow from file upload to Claude API integration
 
 import sys
 import json
+import asyncio
+import time
 import uuid
 from datetime import datetime
 from io import StringIO
@@ -14,7 +16,7 @@ import pandas as pd
 # Add the backend directory to Python path
 sys.path.append('/Volumes/D/Ai/fund-static-data/backend')
 
-from main import uploaded_files_data, load_reference_data
+from main import uploaded_files_data, load_reference_data, save_uploaded_accounts, load_uploaded_accounts, dumps_prompt_json, FILE_ANALYSIS_RE
 
 def test_file_upload_simulation():
     """Simulate file upload and storage"""
@@ -38,30 +40,27 @@ def test_file_upload_simulation():
     print(f"✅ Parsed CSV: {len(df)} accounts")
     
     # Convert to AccountData format (simulating backend processing)
-    accounts = []
-    for _, row in df.iterrows():
-        account = {
-            'account_code': str(row['Account_Code']),
-            'account_description': str(row['Account_Description']),
-            'account_type': str(row['Account_Type']),
-            'account_category': str(row['Account_Category']),
-            'metadata': {}
-        }
-        accounts.append(account)
+    accounts_df = df.rename(columns={
+        'Account_Code': 'account_code',
+        'Account_Description': 'account_description',
+        'Account_Type': 'account_type',
+        'Account_Category': 'account_category'
+    }).astype(str)
+    accounts_df['metadata'] = [{} for _ in range(len(accounts_df))]
+    accounts = accounts_df.to_dict('records')
     
     # Generate session ID and store (simulating upload endpoint)
     session_id = str(uuid.uuid4())
-    uploaded_files_data[session_id] = {
+    asyncio.run(uploaded_files_data.set(session_id, {
         "filename": "test_accounts.csv",
-        "accounts": accounts,
-        "upload_time": datetime.now(),
+        "path": save_uploaded_accounts(session_id, accounts),
+        "upload_time_ns": time.time_ns(),
         "account_count": len(accounts),
         "columns": list(df.columns),
-        "raw_data": df.to_dict('records')[:10]
-    }
+        "raw_data_json": dumps_prompt_json(df.head(10).to_dict('records'))
+    }))
     
     print(f"✅ File data stored with session_id: {session_id}")
-    print(f"✅ Total uploaded sessions: {len(uploaded_files_data)}")
     
     return session_id
 
@@ -70,14 +69,14 @@ def test_chat_context_inclusion(session_id):
     print(f"\n🧪 Testing Chat Context Inclusion for session: {session_id}")
     
     # Simulate chat request processing
-    if session_id and session_id in uploaded_files_data:
-        file_data = uploaded_files_data[session_id]
+    file_data = asyncio.run(uploaded_files_data.get(session_id)) if session_id else None
+    if file_data is not None:
         print(f"✅ Found file data: {file_data['filename']}")
         print(f"✅ Account count: {file_data['account_count']}")
         print(f"✅ Columns: {file_data['columns']}")
         
         # Test system prompt enhancement with ALL account data
-        accounts_data = file_data['accounts']
+        accounts_data = load_uploaded_accounts(file_data['path'])
         detailed_accounts = accounts_data[:3]  # Show first 3 for testing
         
         system_prompt_addition = f"""
@@ -85,7 +84,7 @@ UPLOADED SOURCE FILE CONTEXT:
 - Filename: {file_data['filename']}
 - Total accounts: {file_data['account_count']}
 - Columns: {', '.join(file_data['columns'])}
-- Upload time: {file_data['upload_time']}
+- Upload time: {datetime.fromtimestamp(file_data['upload_time_ns'] / 1e9)}
 
 COMPLETE FIS IO ACCOUNT DATA (sample):
 {json.dumps(detailed_accounts, indent=2)}
@@ -101,8 +100,6 @@ def test_mapping_keywords():
     """Test mapping keyword detection"""
     print(f"\n🧪 Testing Mapping Keyword Detection...")
     
-    file_analysis_keywords = ["map", "mapping", "analyze", "analysis", "suggest", "recommend", "accounts", "data"]
-    
     test_messages = [
         "Please map these accounts to Eagle",
         "Can you analyze the uploaded data?",
@@ -113,7 +110,7 @@ def test_mapping_keywords():
     ]
     
     for message in test_messages:
-        is_file_query = any(keyword in message.lower() for keyword in file_analysis_keywords)
+        is_file_query = FILE_ANALYSIS_RE.search(message.lower()) is not None
         status = "✅ MAPPING" if is_file_query else "💬 CHAT"
         print(f"{status} - '{message}'")
 
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Lexical shortcut checks for MappingTargets, run in-process with no Claude calls
+"""
+
+from main import AccountData, MappingTargets
+
+TARGETS = MappingTargets([
+    AccountData(account_code="101000", account_description="Cash - Operating Account"),
+    AccountData(account_code="101100", account_description="Cash - Payroll Account"),
+    AccountData(account_code="201000", account_description="Accounts Payable - Trade"),
+    AccountData(account_code="401000", account_description="Interest Income"),
+])
+
+def direct_match(code, description):
+    source = AccountData(account_code=code, account_description=description)
+    scores, _ = TARGETS.rank([source])
+    index = TARGETS.direct_match(source, scores[0])
+    return None if index is None else TARGETS.accounts[index].account_code
+
+def test_clear_match_in_the_same_account_class_maps_directly():
+    assert direct_match("2000", "Accounts Payable - Trade") == "201000"
+
+def test_description_subset_is_not_mapped_directly():
+    # Every word of "Cash Account" appears in both cash targets
+    assert direct_match("1010", "Cash Account") is None
+
+def test_match_across_account_classes_is_not_mapped_directly():
+    assert direct_match("7000", "Interest Income") is None
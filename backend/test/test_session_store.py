@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+SessionStore's Redis branch, run against fakeredis so no server is needed
+"""
+
+import asyncio
+
+import fakeredis
+
+from main import SessionStore
+
+TTL = 60
+
+def run_with_store(scenario):
+    """Run scenario(store, redis) on a fresh fakeredis-backed store"""
+    async def run():
+        store = SessionStore("test", list_fields=("results",), ttl=TTL)
+        store.redis = fakeredis.FakeAsyncRedis()
+        try:
+            await scenario(store, store.redis)
+        finally:
+            await store.redis.aclose()
+    asyncio.run(run())
+
+async def assert_expires(redis, key):
+    ttl = await redis.ttl(key)
+    assert 0 < ttl <= TTL, f"{key} has TTL {ttl}"
+
+def test_writes_round_trip_and_keep_an_expiry():
+    async def scenario(store, redis):
+        await store.set("abc", {"status": "processing", "completed": 0, "results": [{"code": "1000"}]})
+        await assert_expires(redis, "test:abc")
+        await assert_expires(redis, "test:abc:results")
+
+        await store.update("abc", status="completed")
+        await assert_expires(redis, "test:abc")
+
+        await store.increment("abc", "completed", 2)
+        await assert_expires(redis, "test:abc")
+
+        await store.append("abc", "results", {"code": "1010"})
+        await assert_expires(redis, "test:abc:results")
+
+        assert await store.get("abc") == {
+            "status": "completed",
+            "completed": 2,
+            "results": [{"code": "1000"}, {"code": "1010"}]
+        }
+    run_with_store(scenario)
+
+def test_writes_after_expiry_recreate_keys_with_an_expiry():
+    async def scenario(store, redis):
+        # Nothing stored: as after the record expired mid-mapping
+        await store.update("gone", status="completed")
+        await store.increment("gone", "completed")
+        await store.append("gone", "results", {"code": "1000"})
+
+        await assert_expires(redis, "test:gone")
+        await assert_expires(redis, "test:gone:results")
+        assert await store.get("gone") == {"status": "completed", "completed": 1, "results": [{"code": "1000"}]}
+    run_with_store(scenario)
+
+def test_missing_session_reads_as_none():
+    async def scenario(store, redis):
+        assert await store.get("missing") is None
+    run_with_store(scenario)
@@ -4,11 +4,12 @@ Test to identify the UI file attachment timing issue
 Simulates the exact UI flow: attach file -> type message -> send
 """
 
-import requests
-import time
-import json
+import re
 
-BACKEND_URL = "http://localhost:8000"
+from backend_client import BACKEND_URL, SESSION
+
+# Words Claude uses when it asks for the data, matched in one case-insensitive pass
+ASKS_FOR_DATA_RE = re.compile("provide|need", re.IGNORECASE)
 
 def simulate_ui_file_attachment_flow():
     """Simulate the exact UI flow that's causing issues"""
@@ -17,10 +18,8 @@ def simulate_ui_file_attachment_flow():
     # Step 1: User attaches file (like dragging into InputArea)
     print("📎 Step 1: User attaches file to InputArea...")
     with open("test-data/fis-io-ledger-accounts.csv", 'rb') as f:
-        file_content = f.read()
-    
-    files = {'file': ('fis-io-ledger-accounts.csv', file_content, 'text/csv')}
-    upload_response = requests.post(f"{BACKEND_URL}/upload-accounts", files=files)
+        files = {'file': ('fis-io-ledger-accounts.csv', f, 'text/csv')}
+        upload_response = SESSION.post(f"{BACKEND_URL}/upload-accounts", files=files)
     
     if upload_response.status_code != 200:
         print(f"❌ File upload failed: {upload_response.text}")
@@ -68,12 +67,12 @@ def simulate_ui_file_attachment_flow():
     }
     
     print(f"   📤 Sending chat request WITHOUT session_id...")
-    chat_response_immediate = requests.post(f"{BACKEND_URL}/chat", json=chat_payload_immediate)
+    chat_response_immediate = SESSION.post(f"{BACKEND_URL}/chat", json=chat_payload_immediate)
     
     if chat_response_immediate.status_code == 200:
         response_immediate = chat_response_immediate.json()['response']
         print(f"   📝 Response length: {len(response_immediate)} chars")
-        if "provide" in response_immediate.lower() or "need" in response_immediate.lower():
+        if ASKS_FOR_DATA_RE.search(response_immediate):
             print(f"   ❌ Claude asks for data (no session_id received)")
         else:
             print(f"   ✅ Claude seems to have data")
@@ -103,7 +102,7 @@ def simulate_ui_file_attachment_flow():
     }
     
     print(f"   📤 Sending chat request WITH session_id...")
-    chat_response_delayed = requests.post(f"{BACKEND_URL}/chat", json=chat_payload_delayed)
+    chat_response_delayed = SESSION.post(f"{BACKEND_URL}/chat", json=chat_payload_delayed)
     
     if chat_response_delayed.status_code == 200:
         response_delayed = chat_response_delayed.json()['response']
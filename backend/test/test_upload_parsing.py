@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Upload handling checks that run against the app in-process, no server needed
+"""
+
+import os
+
+from fastapi.testclient import TestClient
+
+from main import UPLOAD_DIR, app
+
+# Only the core columns, so no metadata is carried through
+CORE_COLUMNS_CSV = b"""Account_Code,Account_Description,Account_Type
+1000,Cash and Cash Equivalents,Asset
+1200,Accounts Receivable,Asset
+2000,Accounts Payable,Liability
+"""
+
+def test_upload_without_metadata_columns_keeps_every_account():
+    client = TestClient(app)
+    response = client.post(
+        "/upload-accounts",
+        files={"file": ("core-columns.csv", CORE_COLUMNS_CSV, "text/csv")}
+    )
+    assert response.status_code == 200
+
+    result = response.json()
+    assert result["accounts_count"] == 3
+    assert [account["account_code"] for account in result["accounts"]] == ["1000", "1200", "2000"]
+    assert all(account["metadata"] == {} for account in result["accounts"])
+
+def test_chat_after_upload_file_is_gone_reports_missing_data():
+    client = TestClient(app)
+    upload = client.post(
+        "/upload-accounts",
+        params={"summary": 1},
+        files={"file": ("core-columns.csv", CORE_COLUMNS_CSV, "text/csv")}
+    )
+    session_id = upload.json()["session_id"]
+    os.remove(os.path.join(UPLOAD_DIR, f"{session_id}.arrow"))
+
+    # A mapping question routes to the file analysis, which reads the removed file
+    response = client.post("/chat", json={"message": "Please map these accounts", "session_id": session_id})
+    assert response.status_code == 200
+    assert response.json()["response"] == "No uploaded file data found for this session."
@@ -3,8 +3,16 @@
 Check what session IDs are currently in backend storage
 """
 
+import re
+
 import requests
 
+# One session so the chat reuses the upload's keep-alive connection
+SESSION = requests.Session()
+
+# Phrases Claude uses when the uploaded file never reached it, matched in one case-insensitive pass
+ASKS_FOR_FILE_RE = re.compile("don't see|please provide", re.IGNORECASE)
+
 def check_backend_sessions():
     print("🔍 Checking Backend Session Storage")
     
@@ -12,10 +20,8 @@ def check_backend_sessions():
     print("\n📎 Step 1: Fresh file upload...")
     try:
         with open("../test-data/fis-io-ledger-accounts.csv", 'rb') as f:
-            file_content = f.read()
-        
-        files = {'file': ('fis-io-ledger-accounts.csv', file_content, 'text/csv')}
-        upload_response = requests.post("http://localhost:8000/upload-accounts", files=files)
+            files = {'file': ('fis-io-ledger-accounts.csv', f, 'text/csv')}
+            upload_response = SESSION.post("http://localhost:8000/upload-accounts", files=files)
         
         if upload_response.status_code == 200:
             upload_result = upload_response.json()
@@ -37,13 +43,13 @@ def check_backend_sessions():
                 "session_id": fresh_session_id
             }
             
-            chat_response = requests.post("http://localhost:8000/chat", json=chat_payload)
+            chat_response = SESSION.post("http://localhost:8000/chat", json=chat_payload)
             
             if chat_response.status_code == 200:
                 response_text = chat_response.json()['response']
                 print(f"✅ Chat successful!")
                 
-                if "don't see" in response_text.lower() or "please provide" in response_text.lower():
+                if ASKS_FOR_FILE_RE.search(response_text):
                     print(f"❌ Claude still asking for file data - backend session issue")
                 else:
                     print(f"🎯 SUCCESS: Claude received file data!")
@@ -4,48 +4,41 @@ Create target account structure reference for Eagle accounts
 """
 
 import pandas as pd
-import json
+import orjson
+
+# CSV column -> reference field, in output order
+ACCOUNT_FIELDS = {
+    'GL_Account': "account_code",
+    'GL_Description': "description",
+    'Account_Class': "account_class",
+    'Sub_Class': "sub_class",
+    'Financial_Statement': "financial_statement",
+    'Normal_Balance': "normal_balance",
+    'Status': "status",
+    'Department': "department",
+    'Cost_Center': "cost_center"
+}
 
 def create_eagle_account_reference():
     print("📊 Creating Eagle Account Structure Reference...")
     
-    # Load Eagle accounts
-    eagle_df = pd.read_csv('test-data/bny-eagle-ledger-accounts.csv')
+    # Load Eagle accounts; every field is stored as text
+    eagle_df = pd.read_csv('test-data/bny-eagle-ledger-accounts.csv').astype(str)
     
     # Create structured reference
-    eagle_accounts = []
-    account_classes = {}
+    eagle_accounts = eagle_df[list(ACCOUNT_FIELDS)].rename(columns=ACCOUNT_FIELDS).to_dict('records')
     
-    for _, row in eagle_df.iterrows():
-        account = {
-            "account_code": str(row['GL_Account']),
-            "description": str(row['GL_Description']),
-            "account_class": str(row['Account_Class']),
-            "sub_class": str(row['Sub_Class']),
-            "financial_statement": str(row['Financial_Statement']),
-            "normal_balance": str(row['Normal_Balance']),
-            "status": str(row['Status']),
-            "department": str(row['Department']),
-            "cost_center": str(row['Cost_Center'])
+    # Group by account class, then sub class, keeping file order; groups hold
+    # indices into all_accounts so each account is written out only once
+    account_classes = {}
+    for class_name, class_df in eagle_df.groupby('Account_Class', sort=False):
+        account_classes[class_name] = {
+            "sub_classes": {
+                sub_class: sub_df.index.tolist()
+                for sub_class, sub_df in class_df.groupby('Sub_Class', sort=False)
+            },
+            "account_indices": class_df.index.tolist()
         }
-        eagle_accounts.append(account)
-        
-        # Group by account class
-        class_name = account['account_class']
-        if class_name not in account_classes:
-            account_classes[class_name] = {
-                "sub_classes": {},
-                "accounts": []
-            }
-        
-        account_classes[class_name]["accounts"].append(account)
-        
-        # Group by sub class
-        sub_class = account['sub_class']
-        if sub_class not in account_classes[class_name]["sub_classes"]:
-            account_classes[class_name]["sub_classes"][sub_class] = []
-        
-        account_classes[class_name]["sub_classes"][sub_class].append(account)
     
     # Create comprehensive reference structure
     eagle_reference = {
@@ -54,16 +47,16 @@ def create_eagle_account_reference():
         "account_structure": {
             "code_format": "6-digit numeric (e.g., 101000)",
             "hierarchy": "Account Class > Sub Class > Individual Accounts",
-            "departments": list(set(acc["department"] for acc in eagle_accounts)),
-            "cost_centers": list(set(acc["cost_center"] for acc in eagle_accounts))
+            "departments": eagle_df['Department'].unique().tolist(),
+            "cost_centers": eagle_df['Cost_Center'].unique().tolist()
         },
         "account_classes": account_classes,
         "all_accounts": eagle_accounts
     }
     
     # Save to JSON file
-    with open('eagle_account_reference.json', 'w') as f:
-        json.dump(eagle_reference, f, indent=2)
+    with open('eagle_account_reference.json', 'wb') as f:
+        f.write(orjson.dumps(eagle_reference, option=orjson.OPT_INDENT_2))
     
     print(f"✅ Created Eagle reference with {len(eagle_accounts)} accounts")
     print(f"📋 Account Classes: {list(account_classes.keys())}")
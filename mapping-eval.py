@@ -3,62 +3,42 @@
 Account Mapping System Evaluation Script
 
 Tests the file upload and mapping analysis functionality by:
-1. Converting CSV test data to Excel format
-2. Uploading to the backend API
-3. Requesting mapping analysis through chat
+1. Uploading the CSV test data to the backend API
+2. Requesting mapping analysis through chat
 """
 
 import os
 import sys
-import pandas as pd
+import orjson
 import requests
-import json
 from datetime import datetime
-import time
+from concurrent.futures import ThreadPoolExecutor
+from charset_normalizer import from_bytes
+
+CSV_ENCODINGS = ['utf_8', 'cp1252', 'latin_1']
+
+def preview(text, limit):
+    """Truncate text for console output, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else text[:limit] + "..."
 
 class MappingEvaluator:
     def __init__(self):
         self.backend_url = "http://localhost:8000"
         self.test_data_dir = "test-data"
+        # Shared across health, upload and chat calls to keep connections alive
+        self.session = requests.Session()
         self.results = {
             "timestamp": datetime.now().isoformat(),
             "test_results": [],
             "summary": {}
         }
     
-    def convert_csv_to_excel(self, csv_file_path, excel_file_path):
-        """Convert CSV to Excel format for upload testing"""
-        print(f"📄 Converting {csv_file_path} to {excel_file_path}")
-        
-        try:
-            # Try different encodings to handle potential encoding issues
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_file_path, encoding=encoding)
-                    print(f"✅ Successfully read CSV with {encoding} encoding")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
-                raise Exception("Could not read CSV with any supported encoding")
-            
-            df.to_excel(excel_file_path, index=False)
-            print(f"✅ Successfully converted to Excel with {len(df)} rows")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to convert CSV to Excel: {e}")
-            return False
-    
     def test_backend_health(self):
         """Test if backend is running"""
         print("🔍 Checking backend health...")
         
         try:
-            response = requests.get(f"{self.backend_url}/health", timeout=5)
+            response = self.session.get(f"{self.backend_url}/health", timeout=5)
             if response.status_code == 200:
                 print("✅ Backend is healthy")
                 return True
@@ -69,50 +49,127 @@ class MappingEvaluator:
             print(f"❌ Backend health check failed: {e}")
             return False
     
-    def upload_file(self, file_path):
+    def read_csv_as_utf8(self, csv_file_path, log=print):
+        """Read a CSV and re-encode it as UTF-8, which the backend's CSV parser expects"""
+        with open(csv_file_path, 'rb') as f:
+            content = f.read()
+        
+        # Detect the encoding in one pass over the bytes instead of trial decodes,
+        # limited to the encodings our ledger exports come in
+        match = from_bytes(content, cp_isolation=CSV_ENCODINGS).best()
+        encoding = match.encoding if match else 'utf_8'
+        if encoding not in ('utf_8', 'ascii'):
+            log(f"📄 Re-encoding {csv_file_path} from {encoding} to utf-8")
+            content = content.decode(encoding).encode('utf-8')
+        return content
+    
+    def upload_file(self, file_path, log=print):
         """Upload file to backend and return session_id"""
-        print(f"📤 Uploading {file_path} to backend...")
+        log(f"📤 Uploading {file_path} to backend...")
         
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(f"{self.backend_url}/upload-accounts", files=files, timeout=30)
+            content = self.read_csv_as_utf8(file_path, log)
+            files = {'file': (os.path.basename(file_path), content, 'text/csv')}
+            response = self.session.post(f"{self.backend_url}/upload-accounts", files=files, timeout=30)
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 session_id = result.get('session_id')
-                print(f"✅ Upload successful! Session ID: {session_id}")
-                print(f"📊 Processed {result.get('account_count', 0)} accounts")
+                log(f"✅ Upload successful! Session ID: {session_id}")
+                log(f"📊 Processed {result.get('accounts_count', 0)} accounts")
                 return session_id
             else:
-                print(f"❌ Upload failed: {response.status_code} - {response.text}")
+                log(f"❌ Upload failed: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
-            print(f"❌ Upload error: {e}")
+            log(f"❌ Upload error: {e}")
             return None
     
-    def chat_with_mapping_analysis(self, session_id, message):
+    def post_json(self, path, payload, **kwargs):
+        """POST a JSON body serialized with orjson"""
+        return self.session.post(
+            f"{self.backend_url}{path}",
+            data=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            **kwargs
+        )
+    
+    def chat_with_mapping_analysis(self, session_id, message, log=print):
         """Send a chat message for mapping analysis"""
-        print(f"💬 Sending mapping analysis request...")
+        log(f"💬 Sending mapping analysis request...")
         
         try:
             data = {
                 "message": message,
                 "session_id": session_id
             }
-            response = requests.post(f"{self.backend_url}/chat", json=data, timeout=60)
+            response = self.post_json("/chat", data, timeout=60)
             
             if response.status_code == 200:
-                result = response.json()
-                print(f"✅ Chat response received")
+                result = orjson.loads(response.content)
+                log(f"✅ Chat response received")
                 return result.get('response', '')
             else:
-                print(f"❌ Chat failed: {response.status_code} - {response.text}")
+                log(f"❌ Chat failed: {response.status_code} - {response.text}")
                 return None
         except Exception as e:
-            print(f"❌ Chat error: {e}")
+            log(f"❌ Chat error: {e}")
             return None
     
+    def evaluate_file(self, csv_file):
+        """Upload one test file and request its analysis; returns (test_result, report lines)"""
+        lines = []
+        log = lines.append
+        log(f"\n🚀 Testing with {csv_file}")
+        log("=" * 50)
+        
+        csv_path = os.path.join(self.test_data_dir, csv_file)
+        if not os.path.exists(csv_path):
+            log(f"❌ Test file not found: {csv_path}")
+            return None, lines
+        
+        # Upload file; the backend parses CSV directly
+        session_id = self.upload_file(csv_path, log)
+        if not session_id:
+            return None, lines
+        
+        # Request mapping analysis
+        mapping_request = f"""
+        I've uploaded account data from {csv_file.replace('.csv', '')}. 
+        Please analyze the accounts and provide insights about:
+        1. Account types and categories
+        2. Account structure and naming patterns
+        3. Any potential mapping recommendations
+        
+        Please provide a detailed analysis of the uploaded account data.
+        """
+        
+        analysis_response = self.chat_with_mapping_analysis(session_id, mapping_request, log)
+        
+        if analysis_response:
+            log(f"📋 Analysis Response:")
+            log("-" * 40)
+            log(preview(analysis_response, 500))
+            log("-" * 40)
+            
+            # Store results
+            test_result = {
+                "file": csv_file,
+                "session_id": session_id,
+                "upload_success": True,
+                "analysis_success": True,
+                "analysis_preview": preview(analysis_response, 200)
+            }
+        else:
+            test_result = {
+                "file": csv_file,
+                "session_id": session_id,
+                "upload_success": True,
+                "analysis_success": False
+            }
+        
+        return test_result, lines
+    
     def run_evaluation(self):
         """Run the complete evaluation workflow"""
         print("🔧 Account Mapping System Evaluation")
@@ -131,69 +188,15 @@ class MappingEvaluator:
             "bny-eagle-ledger-accounts.csv"
         ]
         
-        for csv_file in test_files:
-            print(f"\n🚀 Testing with {csv_file}")
-            print("=" * 50)
-            
-            csv_path = os.path.join(self.test_data_dir, csv_file)
-            if not os.path.exists(csv_path):
-                print(f"❌ Test file not found: {csv_path}")
-                continue
-            
-            # Convert CSV to Excel
-            excel_file = csv_file.replace('.csv', '-test-upload.xlsx')
-            excel_path = excel_file
-            
-            if not self.convert_csv_to_excel(csv_path, excel_path):
-                continue
-            
-            # Upload file
-            session_id = self.upload_file(excel_path)
-            if not session_id:
-                continue
-            
-            # Request mapping analysis
-            mapping_request = f"""
-            I've uploaded account data from {csv_file.replace('.csv', '')}. 
-            Please analyze the accounts and provide insights about:
-            1. Account types and categories
-            2. Account structure and naming patterns
-            3. Any potential mapping recommendations
-            
-            Please provide a detailed analysis of the uploaded account data.
-            """
-            
-            analysis_response = self.chat_with_mapping_analysis(session_id, mapping_request)
-            
-            if analysis_response:
-                print(f"📋 Analysis Response:")
-                print("-" * 40)
-                print(analysis_response[:500] + "..." if len(analysis_response) > 500 else analysis_response)
-                print("-" * 40)
-                
-                # Store results
-                test_result = {
-                    "file": csv_file,
-                    "session_id": session_id,
-                    "upload_success": True,
-                    "analysis_success": True,
-                    "analysis_preview": analysis_response[:200] + "..." if len(analysis_response) > 200 else analysis_response
-                }
-            else:
-                test_result = {
-                    "file": csv_file,
-                    "session_id": session_id,
-                    "upload_success": True,
-                    "analysis_success": False
-                }
-            
-            self.results["test_results"].append(test_result)
-            
-            # Clean up Excel file
-            try:
-                os.remove(excel_path)
-            except:
-                pass
+        # Files are independent, so their upload -> chat chains run side by side;
+        # each collects its own report, printed in file order once all finish
+        with ThreadPoolExecutor(max_workers=len(test_files)) as executor:
+            outcomes = list(executor.map(self.evaluate_file, test_files))
+        
+        for test_result, lines in outcomes:
+            print("\n".join(lines))
+            if test_result:
+                self.results["test_results"].append(test_result)
         
         # Print summary
         print(f"\n📊 Evaluation Summary")
@@ -10,17 +10,15 @@ import os
 # Add the backend directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
-from main import ClaudeClient
+from main import claude_client
 
 async def test_claude_response():
     """Test Claude response format"""
-    claude = ClaudeClient()
-    
     # Sample mapping request
     test_message = "Please map these FIS accounts to Eagle accounts: 1000 Cash, 1010 Checking Account, 2000 Accounts Payable"
     
     try:
-        response = await claude.chat_completion([{"role": "user", "content": test_message}], None)
+        response = await claude_client.chat_completion([{"role": "user", "content": test_message}], None)
         print("=== CLAUDE RESPONSE ===")
         print(response)
         print("\n=== RESPONSE LENGTH ===")
@@ -32,8 +30,13 @@ async def test_claude_response():
         
     except Exception as e:
         print(f"Error: {e}")
-    
-    await claude.close()
 
 if __name__ == "__main__":
-    asyncio.run(test_claude_response())
\ No newline at end of file
+    # One event loop for every call, so the shared client's pooled Claude
+    # connections stay usable between runs and are closed once at the end
+    with asyncio.Runner() as runner:
+        runner.run(claude_client.open())
+        try:
+            runner.run(test_claude_response())
+        finally:
+            runner.run(claude_client.close())
\ No newline at end of file